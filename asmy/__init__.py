@@ -0,0 +1,17 @@
+ARCHITECTURES = ("chip8", "gmc4", "lmc", "mos6502", "sweet16")
+
+__all__ = list(ARCHITECTURES)
+
+
+def __getattr__(name):
+    # Architectures are imported on first use, so `import asmy` stays cheap
+    # and a program only pays for the architecture it assembles
+    if name in ARCHITECTURES:
+        import importlib
+
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(ARCHITECTURES))
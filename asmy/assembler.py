@@ -1,17 +1,410 @@
+import contextvars
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+
+from .listing import Listing
+
+_current = contextvars.ContextVar("asmy_assembler", default=None)
+
+
+def _grown(tree, i):
+    total = 0
+    while i > 0:
+        total += tree[i]
+        i &= i - 1
+    return total
+
+
+def _grow(tree, i, n):
+    i += 1
+    while i < len(tree):
+        tree[i] += n
+        i += i & -i
+
+
+class Expr:
+    """A value computed from labels, e.g. label("table") + 2, lo("table") or
+    label("end") - label("start").
+
+    Expressions can be used wherever a label name is accepted. Equal
+    expressions share one pending fixup list and are evaluated once, when
+    the last label they depend on is defined.
+    """
+
+    __slots__ = ("op", "args", "_hash")
+
+    def __init__(self, op, *args):
+        self.op = op
+        self.args = tuple(_operand(a) for a in args)
+        self._hash = hash((op, self.args))
+
+    def names(self):
+        for a in self.args:
+            if isinstance(a, str):
+                yield a
+            elif isinstance(a, Expr):
+                yield from a.names()
+
+    def value(self, labels):
+        v = [labels[a] if isinstance(a, str) else a for a in self.args]
+        v = [a.value(labels) if isinstance(a, Expr) else a for a in v]
+        if self.op == "+":
+            return v[0] + v[1]
+        if self.op == "-":
+            return v[0] - v[1]
+        if self.op == "lo":
+            return v[0] & 0xFF
+        return v[0] >> 8 & 0xFF
+
+    def __add__(self, other):
+        return Expr("+", self, other)
+
+    def __radd__(self, other):
+        return Expr("+", other, self)
+
+    def __sub__(self, other):
+        return Expr("-", self, other)
+
+    def __rsub__(self, other):
+        return Expr("-", other, self)
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, Expr)
+            and self._hash == other._hash
+            and (self.op, self.args) == (other.op, other.args)
+        )
+
+    def __hash__(self):
+        return self._hash
+
+    def __repr__(self):
+        if self.op in ("lo", "hi"):
+            return f"{self.op}({self.args[0]})"
+        return f"({self.args[0]} {self.op} {self.args[1]})"
+
+
+def _operand(x):
+    name = getattr(x, "name", None)  # Assembler.Label
+    return x if name is None or isinstance(x, Expr) else name
+
+
+def lo(x):
+    """Low byte of an address, label name or expression."""
+    return x & 0xFF if isinstance(x, int) else Expr("lo", x)
+
+
+def hi(x):
+    """High byte of an address, label name or expression."""
+    return x >> 8 & 0xFF if isinstance(x, int) else Expr("hi", x)
+
+
+# Built-in fixup kinds, passed to Assembler.fixup() in place of a patch function
+ABS_LE, ABS_BE, REL8, CHIP8, LMC, GMC4, CUSTOM = range(7)
+
+
+def patch(rom, kind, pos, size, arg, address, patchers=()):
+    """Write address into rom at pos as a fixup of the given kind.
+
+    arg is the PC after the branch for REL8, the opcode for CHIP8 and LMC,
+    and an index into patchers for CUSTOM.
+    """
+    if kind == ABS_LE:
+        rom[pos : pos + size] = address.to_bytes(size, "little")
+    elif kind == ABS_BE:
+        rom[pos : pos + size] = address.to_bytes(size, "big")
+    elif kind == REL8:
+        offset = address - arg
+        if not -128 <= offset <= 127:
+            raise ValueError(f"Branch out of range ({offset})")
+        rom[pos] = offset & 0xFF
+    elif kind == CHIP8:
+        rom[pos : pos + 2] = (arg | address & 0xFFF).to_bytes(2, "big")
+    elif kind == LMC:
+        # Mailboxes are two bytes wide
+        rom[pos : pos + 2] = (arg * 100 + address // 2 % 100).to_bytes(2, "big")
+    elif kind == GMC4:
+        rom[pos : pos + 2] = bytes((address >> 4, address & 0xF))
+    else:
+        patchers[arg](rom, pos, address)
+
+
+class Fixups:
+    """Pending references, stored as records in parallel array columns.
+
+    Records of one label form a linked list through the next column, so
+    resolving a label walks only its own records. Resolved records are
+    recycled through a free list.
+    """
+
+    def __init__(self):
+        self.kind = array("B")
+        self.size = array("B")
+        self.section = array("H")
+        self.pos = array("q")
+        self.arg = array("q")
+        self.next = array("q")
+        self.heads = {}
+        self.tails = {}
+        self.patchers = []
+        self._patchers = {}
+        self.free = -1
+
+    def __len__(self):
+        return len(self.heads)
+
+    def __contains__(self, label):
+        return label in self.heads
+
+    def __iter__(self):
+        return iter(list(self.heads))
+
+    def clear(self):
+        for column in (self.kind, self.size, self.section, self.pos, self.arg):
+            del column[:]
+        del self.next[:]
+        self.heads.clear()
+        self.tails.clear()
+        self.patchers.clear()
+        self._patchers.clear()
+        self.free = -1
+
+    def add(self, label, kind, size, section, pos, arg=0):
+        if callable(kind):
+            i = self._patchers.get(id(kind))
+            if i is None:
+                i = self._patchers[id(kind)] = len(self.patchers)
+                self.patchers.append(kind)
+            kind, arg = CUSTOM, i
+        i = self.free
+        if i < 0:
+            i = len(self.pos)
+            self.kind.append(kind)
+            self.size.append(size)
+            self.section.append(section)
+            self.pos.append(pos)
+            self.arg.append(arg)
+            self.next.append(-1)
+        else:
+            self.free = self.next[i]
+            self.kind[i], self.size[i], self.section[i] = kind, size, section
+            self.pos[i], self.arg[i], self.next[i] = pos, arg, -1
+        tail = self.tails.get(label)
+        if tail is None:
+            self.heads[label] = i
+        else:
+            self.next[tail] = i
+        self.tails[label] = i
+
+    def records(self, label):
+        """Yield the record indexes of label in the order they were added."""
+        i = self.heads.get(label, -1)
+        while i >= 0:
+            yield i
+            i = self.next[i]
+
+    def pop(self, label):
+        """Remove the records of label, returning its first and last index.
+
+        The records stay readable until the next add(). Returns (-1, -1) if
+        there are none.
+        """
+        head = self.heads.pop(label, -1)
+        if head < 0:
+            return -1, -1
+        tail = self.tails.pop(label)
+        self.next[tail], self.free = self.free, head
+        return head, tail
+
+
+def _code_key(code):
+    # Compares what a function does, not where it sits in the source file
+    consts = tuple(
+        _code_key(c) if hasattr(c, "co_code") else repr(c) for c in code.co_consts
+    )
+    return code.co_code, code.co_names, consts
+
+
+def _global_names(code):
+    yield from code.co_names
+    for c in code.co_consts:
+        if hasattr(c, "co_code"):
+            yield from _global_names(c)
+
+
+def _fn_key(fn, seen):
+    # What a block function emits depends on its code, defaults and closure,
+    # the globals it reads and, recursively, the functions it calls. asmy's
+    # own functions only count by name, they do not change within a process.
+    if fn in seen:
+        return fn.__qualname__
+    seen.add(fn)
+    g = fn.__globals__
+    names = sorted({n for n in _global_names(fn.__code__) if n in g})
+    closure = [c.cell_contents for c in fn.__closure__ or ()]
+    defaults = list(fn.__defaults__ or ())
+    values = [_value_key(v, seen) for v in defaults + closure + [g[n] for n in names]]
+    return _code_key(fn.__code__), repr((len(defaults), names, values))
+
+
+def _value_key(v, seen):
+    # Values are reduced to something with a stable repr where possible, so
+    # the key can also be compared across processes, see asmy.cache
+    if type(v) is type(os):
+        return v.__name__
+    module = getattr(v, "__module__", None) or ""
+    is_fn = hasattr(v, "__code__") and hasattr(v, "__globals__")
+    if module == __package__ or module.startswith(__package__ + "."):
+        if is_fn:
+            return f"{module}.{v.__qualname__}"
+        if type(v).__repr__ is object.__repr__:
+            return f"{module}.{type(v).__qualname__}"
+    elif is_fn:
+        return _fn_key(v, seen)
+    return v
+
+
 class Assembler:
-    def __init__(self, endian="little", pc_start=0):
-        self.rom = bytearray()
+    # Bytes of the code section kept in memory before streaming them to out
+    FLUSH_SIZE = 1 << 16
+
+    def __init__(
+        self, endian="little", pc_start=0, relax=False, out=None, listing=False
+    ):
+        if relax and out is not None:
+            raise ValueError("Relax mode cannot stream its output")
+        # out is a path or a real file, as finalize() maps it into memory
+        self._owns_out = isinstance(out, (str, os.PathLike))
+        if self._owns_out:
+            out = open(out, "w+b")
+        elif out is not None:
+            try:
+                out.fileno()
+            except (AttributeError, OSError, ValueError):
+                raise ValueError("out must be a path or a file with a descriptor")
+        self.out = out
+        self._maps = []
+        self.late = []
+        self.listing = Listing(self) if listing else None
+        # Recorded blocks survive reset(), see block()
+        self.blocks = {}
+        self._recording = []
+        # Instructions, labels and data recorded instead of emitted, see
+        # asmy.peephole
+        self.trace = None
         self.pc_start = pc_start
-        self.pc = pc_start
         self.labels = {}
-        self.fixups = []
+        self.fixups = Fixups()
         self.endian = endian
+        self._abs = ABS_LE if endian == "little" else ABS_BE
+        # In relax mode label references are only resolved by finalize(),
+        # after variable-size spans have been laid out
+        self.relax = relax
+        self.label_pos = {}
+        # Expressions with pending fixups, by the label they wait for
+        self.waiting = {}
+        self.sections = {}
+        self.section_list = []
+        self._section = None
+        self._switch(self.Section("code", pc_start, self))
+        self.sections["code"] = self._section
+        self._tokens = []
+
+    def __enter__(self):
+        self._tokens.append(_current.set(self))
+        return self
+
+    def __exit__(self, *args):
+        _current.reset(self._tokens.pop())
+
+    @staticmethod
+    def current(default=None):
+        """Return the assembler entered in the current context, or default."""
+        asm = _current.get()
+        return default if asm is None else asm
 
     def reset(self):
+        code = self.sections["code"]
+        self.sections = {"code": code}
+        del self.section_list[1:]
+        self._switch(code)
         self.rom.clear()
         self.pc = self.pc_start
+        code.spans.clear()
+        code.anchors.clear()
+        code.restores.clear()
+        code.offset = 0
+        if self.out is not None:
+            self.out.seek(0)
+            self.out.truncate()
+        self.late.clear()
+        if self.listing is not None:
+            self.listing.clear()
         self.labels.clear()
         self.fixups.clear()
+        self.waiting.clear()
+        self.label_pos.clear()
+        self.trace = None
+
+    class Section:
+        """A named region of output with its own base address and PC.
+
+        `with asm.section("data", 0x2000):` emits into the section and
+        switches back on exit; sections can be re-entered to append more.
+        """
+
+        def __init__(self, name, base, assembler):
+            self.name = name
+            self.base = base
+            self.pc = base
+            self.rom = bytearray()
+            # Bytes already streamed out, rom holds the rest
+            self.offset = 0
+            self.spans = []
+            self.anchors = []
+            self.assembler = assembler
+            # Sections to switch back to, one per pending exit
+            self.restores = []
+            self.index = len(assembler.section_list)
+            assembler.section_list.append(self)
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            self.assembler._switch(self.restores.pop())
+
+        @property
+        def size(self):
+            return self.offset + len(self.rom)
+
+    def _switch(self, section):
+        # The current section's rom is aliased as self.rom, its PC as self.pc
+        prev = self._section
+        if prev is not None:
+            prev.pc = self.pc
+        self._section, self.rom, self.pc = section, section.rom, section.pc
+        return prev
+
+    def _untraced(self, what):
+        # Only what asmy.peephole can record and replay in order may be used
+        # while a trace is recorded
+        raise ValueError(f"{what} is not supported in a peephole block")
+
+    def section(self, name, base=None):
+        """Switch to the named section, creating it at base if needed."""
+        if self.trace is not None:
+            self._untraced("section()")
+        section = self.sections.get(name)
+        if section is None:
+            if base is None:
+                raise ValueError(f"Section {name} needs a base address")
+            self.sections[name] = section = self.Section(name, base, self)
+        elif base is not None and base != section.base:
+            raise ValueError(f"Section {name} already based at {section.base:04X}")
+        section.restores.append(self._switch(section))
+        return section
 
     class Label:
         def __init__(self, name, assembler):
@@ -20,90 +413,439 @@ class Assembler:
 
         def __enter__(self):
             # TODO: fail on duplicate labels
-            self.assembler.labels[self.name] = self.assembler.pc
-            self.assembler._resolve_fixups(self.name)
+            asm = self.assembler
+            if asm.trace is not None:
+                asm.trace.append(("label", self.name))
+                return self
+            asm.labels[self.name] = asm.pc
+            if asm._recording:
+                asm._recording[-1][0].append((self.name, len(asm.rom)))
+            if asm.relax:
+                asm.label_pos[self.name] = (asm._section, len(asm.rom))
+            else:
+                asm._resolve_fixups(self.name)
+                if asm.out is not None and len(asm.rom) >= asm.FLUSH_SIZE:
+                    asm.flush()
             return self
 
         def __exit__(self, *args):
             pass
 
+        def __add__(self, other):
+            return Expr("+", self, other)
+
+        def __radd__(self, other):
+            return Expr("+", other, self)
+
+        def __sub__(self, other):
+            return Expr("-", self, other)
+
+        def __rsub__(self, other):
+            return Expr("-", other, self)
+
         def addr(self):
             if not self.name in self.assembler.labels:
                 raise ValueError(f"Label {self.name} not defined")
             return self.assembler.labels[self.name]
 
+    def _undefined(self, key):
+        if isinstance(key, Expr):
+            return next((n for n in key.names() if n not in self.labels), None)
+        return None if key in self.labels else key
+
     def _resolve_fixups(self, label_name):
-        if label_name not in self.labels:
+        # Pending fixups are indexed by label, so defining a label only
+        # touches the references to that label.
+        for expr in self.waiting.pop(label_name, ()):
+            name = self._undefined(expr)
+            if name is None:
+                self._resolve_fixups(expr)
+            else:
+                self.waiting.setdefault(name, []).append(expr)
+        if self._undefined(label_name) is not None:
+            return
+        f = self.fixups
+        i, last = f.pop(label_name)
+        if i < 0:
             return
-        address = self.labels[label_name]
-        remaining = []
-        for fixup in self.fixups:
-            pos, lname, patch_fn = fixup
-            if lname == label_name:
+        if isinstance(label_name, Expr):
+            address = label_name.value(self.labels)
+        else:
+            address = self.labels[label_name]
+        sections, patchers = self.section_list, f.patchers
+        kinds, sizes, args = f.kind, f.size, f.arg
+        while i >= 0:
+            section, pos = sections[f.section[i]], f.pos[i]
+            record = (kinds[i], pos - section.offset, sizes[i], args[i], address)
+            if pos < section.offset:
+                # Already streamed out, patched in the file by finalize()
+                self.late.append((label_name, (kinds[i], pos) + record[2:]))
+            else:
                 try:
-                    patch_fn(self.rom, pos, address)
+                    patch(section.rom, *record, patchers)
                 except Exception as e:
                     raise ValueError(f"Error patching {label_name} at {pos:04x}: {e}")
-            else:
-                remaining.append(fixup)
-        self.fixups = remaining
+            i = -1 if i == last else f.next[i]
+
+    def close(self):
+        """Release the memory maps returned by finalize() and close out if it
+        was opened from a path. Views of the maps must be released first."""
+        for image in self._maps:
+            image.close()
+        self._maps.clear()
+        if self._owns_out:
+            self.out.close()
+
+    def flush(self):
+        """Stream the code section written so far to out.
+
+        References into flushed bytes that are still pending are patched in
+        place through mmap by finalize().
+        """
+        code = self.sections["code"]
+        self.out.seek(code.offset)
+        self.out.write(code.rom)
+        code.offset += len(code.rom)
+        code.rom.clear()
 
     def _emit_label_ref(self, label, size):
-        def resolver(rom, pos, address):
-            resolved = address
-            rom[pos : pos + size] = resolved.to_bytes(size, self.endian)
+        self.fixup(_operand(label), size, self._abs)
 
-        if label.name in self.labels:
-            resolver(self.rom, len(self.rom), self.labels[label.name])
-        else:
-            pos = len(self.rom)
-            self.rom += bytes(size)
-            self.pc += size
-            self.fixups.append((pos, label.name, resolver))
+    def fixup(self, label, size, patcher, arg=0):
+        """Reserve size bytes referring to label (a name or an Expr).
 
-    def fixup(self, label, size, patcher):
+        patcher is one of the built-in kinds (ABS_LE, REL8, ...) with its
+        arg, or a function patcher(rom, pos, address).
+        """
+        if self.trace is not None:
+            self._untraced("fixup()")
+        if self.listing is not None:
+            self.listing.note()
         pos = len(self.rom)
         self.rom += bytes(size)
         self.pc += size
-        if label in self.labels:
-            addr = self.labels[label]
-            patcher(self.rom, pos, addr)
+        if self._recording:
+            self._recording[-1][1].append((label, pos, size, patcher, arg))
+        self._refer(label, pos, size, patcher, arg)
+
+    def _refer(self, label, pos, size, patcher, arg):
+        undefined = self._undefined(label)
+        if undefined is None and not self.relax:
+            if isinstance(label, Expr):
+                addr = label.value(self.labels)
+            else:
+                addr = self.labels[label]
+            if callable(patcher):
+                patcher(self.rom, pos, addr)
+            else:
+                patch(self.rom, patcher, pos, size, arg, addr)
         else:
-            self.fixups.append((pos, label, patcher))
+            if label not in self.fixups and isinstance(label, Expr):
+                if undefined is not None:
+                    self.waiting.setdefault(undefined, []).append(label)
+            s = self._section
+            self.fixups.add(label, patcher, size, s.index, s.offset + pos, arg)
+
+    def block(self, name, fn, *args):
+        """Emit fn(*args) as a block starting at label name.
+
+        The block's bytes, labels and references are recorded and kept across
+        reset(). When the same code with the same arguments is emitted again
+        at the same address, the recording is replayed instead of calling fn,
+        and only its references are patched again. Returns True if replayed.
+
+        The code compared covers fn, the functions it calls and the values of
+        the globals they read, but not values reached through attributes,
+        such as settings.VALUE of an imported module.
+        """
+        if self.trace is not None:
+            self._untraced("block()")
+        if self.relax:
+            raise ValueError("Blocks are not supported in relax mode")
+        key = (_fn_key(fn, set()), repr(args), self._section.name, self.pc)
+        cached = self.blocks.get(name)
+        if cached is not None and cached[0] == key:
+            _, code, labels, refs = cached
+            start, pc = len(self.rom), self.pc
+            self.rom += code
+            self.pc += len(code)
+            if self._recording:
+                record = self._recording[-1]
+                record[0].extend((n, start + pos) for n, pos in labels)
+                record[1].extend((r[0], start + r[1]) + r[2:] for r in refs)
+            for label, pos, size, patcher, arg in refs:
+                self._refer(label, start + pos, size, patcher, arg)
+            for label, pos in labels:
+                self.labels[label] = pc + pos
+                self._resolve_fixups(label)
+            return True
+        section, offset = self._section, self._section.offset
+        self._recording.append(([], []))
+        try:
+            with self.label(name):
+                pass
+            start = len(self.rom)
+            fn(*args)
+        finally:
+            labels, refs = self._recording.pop()
+        if self._recording:
+            self._recording[-1][0].extend(labels)
+            self._recording[-1][1].extend(refs)
+        if self._section is section and section.offset == offset:
+            code = bytes(self.rom[start:])
+            labels = [(n, pos - start) for n, pos in labels]
+            refs = [(r[0], r[1] - start) + r[2:] for r in refs]
+            self.blocks[name] = (key, code, labels, refs)
+        else:
+            self.blocks.pop(name, None)
+        return False
+
+    def span(self, label, sizes, encode):
+        """Emit a variable-size reference to label (relax mode only).
+
+        sizes lists the possible encodings from shortest to longest and
+        encode(pc, addr, size) returns the bytes of the size-byte form placed
+        at pc and referring to addr, or None if that form cannot reach addr.
+        Spans start at their shortest form and grow in finalize().
+        """
+        if self.trace is not None:
+            self._untraced("span()")
+        if self.listing is not None:
+            self.listing.note()
+        self._section.spans.append([len(self.rom), label, sizes, encode, 0])
+        self.rom += bytes(sizes[0])
+        self.pc += sizes[0]
 
     def label(self, name):
         return self.Label(name, self)
 
     def org(self, address):
-        if address < len(self.rom) + self.pc_start:
+        if self.trace is not None:
+            return self.trace.append(("org", (address,)))
+        if self.listing is not None:
+            self.listing.note()
+        base = self._section.base + self._section.offset
+        if address < len(self.rom) + base:
             raise ValueError(f"ORG conflict at {address:04X}")
-        self.rom += bytes(address - self.pc_start - len(self.rom))
+        pad = len(self.rom)
+        self.rom += bytes(address - base - len(self.rom))
         self.pc = address
+        if self.relax:
+            self._section.anchors.append((pad, len(self.rom), address))
 
     def db(self, *values):
+        if self.trace is not None:
+            return self.trace.append(("db", values))
+        if self.listing is not None:
+            self.listing.note()
         for v in values:
             if isinstance(v, str):
                 self.rom += v.encode("ascii")
                 self.pc += len(v)
-            elif isinstance(v, self.Label):
+            elif isinstance(v, (self.Label, Expr)):
                 self._emit_label_ref(v, 1)
             else:
                 self.rom.append(v & 0xFF)
                 self.pc += 1
+        if self.out is not None and len(self.rom) >= self.FLUSH_SIZE:
+            self.flush()
 
     def dw(self, *values):
+        if self.trace is not None:
+            return self.trace.append(("dw", values))
+        if self.listing is not None:
+            self.listing.note()
         for v in values:
-            if isinstance(v, self.Label):
+            if isinstance(v, (self.Label, Expr)):
                 self._emit_label_ref(v, 2)
             else:
                 self.rom += (v & 0xFFFF).to_bytes(2, self.endian)
                 self.pc += 2
+        if self.out is not None and len(self.rom) >= self.FLUSH_SIZE:
+            self.flush()
+
+    def _relax(self):
+        sections = list(self.sections.values())
+        spans = [(s, span) for s in sections for span in s.spans]
+        missing = [span[1] for _, span in spans if span[1] not in self.labels]
+        if missing:
+            raise ValueError(
+                "\n".join(f"Unresolved reference {name}" for name in missing)
+            )
+        # Per section: ORG anchors, span starts and a Fenwick tree of growth
+        layout = {}
+        for s in sections:
+            anchors = [(0, 0, s.base)] + s.anchors
+            starts = [span[0] for span in s.spans]
+            tree = [0] * (len(s.spans) + 1)
+            layout[s] = (anchors, [a[1] for a in anchors], starts, tree)
 
-    def finalize(self):
-        if self.fixups:
+        def addr(section, pos):
+            anchors, anchor_starts, starts, tree = layout[section]
+            _, start, address = anchors[bisect_right(anchor_starts, pos) - 1]
+            g = _grown(tree, bisect_left(starts, pos))
+            g -= _grown(tree, bisect_left(starts, start))
+            return address + pos - start + g
+
+        # Grow spans that cannot reach their target until nothing changes.
+        # Only spans that can still grow are revisited.
+        targets = [self.label_pos[span[1]] for _, span in spans]
+        index = [i for s in sections for i in range(len(s.spans))]
+        work = [i for i, (_, span) in enumerate(spans) if len(span[2]) > 1]
+        changed = True
+        while work and changed:
+            changed, again = False, []
+            for i in work:
+                section, span = spans[i]
+                pos, _, sizes, encode, k = span
+                if encode(addr(section, pos), addr(*targets[i]), sizes[k]) is None:
+                    span[4] = k = k + 1
+                    _grow(layout[section][3], index[i], sizes[k] - sizes[k - 1])
+                    changed = True
+                if k + 1 < len(sizes):
+                    again.append(i)
+            work = again
+
+        # Rebuild each section once with the final span sizes
+        images, i = {}, 0
+        for s in sections:
+            rom, base, anchors = s.rom, s.base, layout[s][0]
+            out, cur, a = bytearray(), 0, 1
+            for pos, name, sizes, encode, k in s.spans + [(None,) * 5]:
+                end = len(rom) if pos is None else pos
+                while a < len(anchors) and anchors[a][1] <= end:
+                    pad, start, address = anchors[a]
+                    out += rom[cur:pad]
+                    if address < base + len(out):
+                        raise ValueError(f"ORG conflict at {address:04X}")
+                    out += bytes(address - base - len(out))
+                    cur, a = start, a + 1
+                out += rom[cur:end]
+                if pos is None:
+                    break
+                code = encode(base + len(out), addr(*targets[i]), sizes[k])
+                if code is None:
+                    raise ValueError(f"Reference to {name} out of range at {pos:04X}")
+                out += code
+                cur, i = pos + sizes[0], i + 1
+            images[s] = out
+
+        for name, (s, pos) in self.label_pos.items():
+            self.labels[name] = addr(s, pos)
+            self.label_pos[name] = (s, addr(s, pos) - s.base)
+        f = self.fixups
+        for label in f:
+            for i in f.records(label):
+                s = self.section_list[f.section[i]]
+                if f.kind[i] == REL8:  # arg is the PC after the branch
+                    f.arg[i] = addr(s, f.pos[i]) + 1
+                f.pos[i] = addr(s, f.pos[i]) - s.base
+        if self.listing is not None:
+            self.listing.relocate(lambda s, pos: addr(s, pos) - s.base)
+        self._section.pc = self.pc
+        for s, out in images.items():
+            s.rom[:] = out
+            s.pc = s.base + len(out)
+            s.spans.clear()
+            s.anchors.clear()
+        self.pc = self._section.pc
+
+    def finalize(self, chunks=False):
+        """Resolve all references and link the sections.
+
+        Returns a flat image starting at pc_start, or with chunks=True a list
+        of (address, bytes) for each non-empty section in address order.
+        When streaming to out, the image is a memoryview of the mapped file.
+        """
+        if self.relax:
+            self._relax()
+            for label in list(self.fixups):
+                self._resolve_fixups(label)
+        f = self.fixups
+        if f:
             unresolved = [
-                f"Unresolved reference {label} at {pos:04X}"
-                for pos, label, _ in self.fixups
+                f"Unresolved reference {label} at "
+                f"{self.section_list[f.section[i]].base + f.pos[i]:04X}"
+                for label in f
+                for i in f.records(label)
             ]
             raise ValueError("\n".join(unresolved))
-        return bytes(self.rom)
+        used = sorted(
+            (s for s in self.sections.values() if s.size or s.name == "code"),
+            key=lambda s: s.base,
+        )
+        for prev, s in zip(used, used[1:]):
+            if prev.base + prev.size > s.base:
+                raise ValueError(f"Section {s.name} overlaps {prev.name}")
+        if self.out is not None:
+            return self._finalize_stream(used, chunks)
+        if chunks:
+            return [(s.base, bytes(s.rom)) for s in used if s.rom]
+        if len(used) == 1:
+            return bytes(used[0].rom)
+        image = bytearray()
+        for s in used:
+            if s.base < self.pc_start:
+                raise ValueError(f"Section {s.name} starts below {self.pc_start:04X}")
+            image += bytes(s.base - self.pc_start - len(image))
+            image += s.rom
+        return bytes(image)
+
+    def _finalize_stream(self, used, chunks):
+        self.flush()
+        for s in used:
+            if s.base < self.pc_start:
+                raise ValueError(f"Section {s.name} starts below {self.pc_start:04X}")
+            if s.name != "code":
+                self.out.seek(s.base - self.pc_start)
+                self.out.write(s.rom)
+        self.out.flush()
+        size = max(s.base + s.size for s in used) - self.pc_start
+        if size == 0:
+            return [] if chunks else memoryview(b"")
+        import mmap  # only needed when streaming
+
+        image = mmap.mmap(self.out.fileno(), size)
+        self._maps.append(image)
+        for label, (kind, pos, size, arg, address) in self.late:
+            try:
+                patch(image, kind, pos, size, arg, address, self.fixups.patchers)
+            except Exception as e:
+                raise ValueError(f"Error patching {label} at {pos:04x}: {e}")
+        self.late.clear()
+        view = memoryview(image)
+        if not chunks:
+            return view
+        return [
+            (s.base, view[s.base - self.pc_start :][: s.size]) for s in used if s.size
+        ]
+
+
+class CurrentAssembler:
+    """Forwards to the assembler entered in the current context.
+
+    Architecture modules emit through this proxy, so `with asm.new() as a:`
+    scopes all mnemonic calls in a thread or task to a private assembler.
+    Outside of any such block the module-wide default assembler is used.
+    """
+
+    def __init__(self, default):
+        self.default = default
+
+    def __getattr__(self, name):
+        return getattr(Assembler.current(self.default), name)
+
+    def get(self):
+        """Return the assembler that mnemonics currently emit into."""
+        return Assembler.current(self.default)
+
+    def new(self, **options):
+        """Create an assembler configured like the default one."""
+        d = self.default
+        defaults = {
+            "endian": d.endian,
+            "pc_start": d.pc_start,
+            "relax": d.relax,
+            "listing": d.listing is not None,
+        }
+        return Assembler(**{**defaults, **options})
@@ -0,0 +1,32 @@
+import importlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+
+def _module(arch):
+    name = arch if isinstance(arch, str) else arch.__name__
+    return name if "." in name else f"asmy.{name}"
+
+
+def _build(arch, builder):
+    asm = importlib.import_module(arch).asm
+    asm.reset()
+    builder()
+    return asm.finalize(), dict(asm.labels)
+
+
+def build(builders, arch, max_workers=None, chunksize=None):
+    """Assemble program builders across a process pool.
+
+    Each builder is a picklable callable that emits a program using the
+    mnemonics of the given architecture (a module or a name like "chip8").
+    Returns a list of (rom, labels) pairs in the order of builders.
+    """
+    builders = list(builders)
+    workers = max_workers or os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(1, len(builders) // (workers * 4))
+    fn = partial(_build, _module(arch))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(fn, builders, chunksize=chunksize))
@@ -0,0 +1,139 @@
+import hashlib
+import importlib
+import json
+import os
+import re
+import sys
+import tempfile
+
+from .assembler import _value_key
+from .batch import _module
+
+# Default object reprs hold a memory address, which differs between runs
+_ADDRESS = re.compile(r" at 0x[0-9a-f]+>")
+
+
+def _version():
+    try:
+        from importlib.metadata import version
+
+        return version("asmy")
+    except Exception:
+        return "dev"
+
+
+class Cache:
+    """On-disk cache of assembled programs.
+
+    Entries are keyed by a hash of the builder's code, defaults, closure and
+    the globals it reads, recursively through the functions it calls, along
+    with the architecture module, the assembler core, the build options and
+    the asmy version, so a cache directory can be shared between machines.
+    The least recently used entries are evicted once the directory exceeds
+    max_size. Modules the builder reads only count by name: a value reached
+    through an attribute, like `settings.SIZE`, is not part of the key.
+    """
+
+    def __init__(self, path=None, max_size=64 << 20):
+        if path is None:
+            path = os.environ.get("ASMY_CACHE") or os.path.join(
+                os.path.expanduser("~"), ".cache", "asmy"
+            )
+        self.path = path
+        self.max_size = max_size
+        self._sources = {}
+        os.makedirs(path, exist_ok=True)
+
+    def _source(self, module):
+        # Source digests are remembered until the file changes
+        filename = getattr(sys.modules[module], "__file__", None)
+        if filename is None:
+            return module
+        st = os.stat(filename)
+        cached = self._sources.get(filename)
+        if cached is None or cached[0] != (st.st_mtime_ns, st.st_size):
+            with open(filename, "rb") as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+            cached = self._sources[filename] = ((st.st_mtime_ns, st.st_size), digest)
+        return cached[1]
+
+    def key(self, builder, arch, **options):
+        """Return the cache key of building builder for arch with options.
+
+        Returns None when the builder cannot be keyed deterministically, e.g.
+        when it reads an object without a stable repr.
+        """
+        fn, args = builder, ()
+        while hasattr(fn, "func"):  # functools.partial
+            args = (fn.args, fn.keywords, args)
+            fn = fn.func
+        arch = _module(arch)
+        importlib.import_module(arch)
+        parts = [
+            _version(),
+            self._source(__package__ + ".assembler"),
+            self._source(arch),
+            repr(_value_key(fn, set())),
+            repr(args),
+            repr(sorted(options.items())),
+        ]
+        if any(_ADDRESS.search(part) for part in parts[3:5]):
+            return None
+        return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+    def get(self, key):
+        """Return the cached (rom, labels) for key, or None."""
+        filename = os.path.join(self.path, key)
+        try:
+            with open(filename, "rb") as f:
+                labels = json.loads(f.readline())
+                rom = f.read()
+            os.utime(filename)
+        except (OSError, ValueError):
+            return None
+        return rom, labels
+
+    def put(self, key, rom, labels):
+        fd, tmp = tempfile.mkstemp(dir=self.path, prefix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(json.dumps(labels).encode() + b"\n")
+            f.write(rom)
+        os.replace(tmp, os.path.join(self.path, key))
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits max_size."""
+        entries, total = [], 0
+        with os.scandir(self.path) as it:
+            for e in it:
+                if e.is_file() and not e.name.startswith("."):
+                    st = e.stat()
+                    entries.append((st.st_mtime_ns, st.st_size, e.path))
+                    total += st.st_size
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def build(self, builder, arch, **options):
+        """Assemble builder for arch, or return the cached result.
+
+        options are passed to the architecture's asm.new(), the result is a
+        (rom, labels) pair as returned by asmy.batch.build(). Builders
+        without a key are always assembled and never stored.
+        """
+        key = self.key(builder, arch, **options)
+        hit = None if key is None else self.get(key)
+        if hit is not None:
+            return hit
+        asm = importlib.import_module(_module(arch)).asm
+        with asm.new(**options) as a:
+            builder()
+            rom, labels = bytes(a.finalize()), dict(a.labels)
+        if key is not None:
+            self.put(key, rom, labels)
+        return rom, labels
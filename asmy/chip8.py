@@ -1,13 +1,15 @@
-from .assembler import Assembler
+from .assembler import CHIP8, Assembler, CurrentAssembler, Expr
 
-asm = Assembler(endian="big", pc_start=0x200)
+asm = CurrentAssembler(Assembler(endian="big", pc_start=0x200))
 label = lambda name: asm.label(name)
-org, db, dw = asm.org, asm.db, asm.dw
+org = lambda addr: asm.org(addr)
+db = lambda *values: asm.db(*values)
+dw = lambda *values: asm.dw(*values)
 
 V0, V1, V2, V3, V4, V5, V6, V7, V8, V9, VA, VB, VC, VD, VE, VF = [
     f"V{x}" for x in "0123456789ABCDEF"
 ]
-I, DT, ST, HF, K, R = "I", "DT", "ST", "HF", "K", "R"
+I, DT, ST, HF, K, R, F, B = "I", "DT", "ST", "HF", "K", "R", "F", "B"
 
 
 def _isreg(r):
@@ -20,14 +22,97 @@ def _reg(r):
     return int(r[1], 16)
 
 
-def _patch(op):
-    return lambda rom, pos, addr: rom.__setitem__(
-        slice(pos, pos + 2), (op | (addr & 0xFFF)).to_bytes(2, "big")
-    )
+def _is_label(x):
+    return isinstance(x, Expr) or isinstance(x, str) and not _isreg(x)
 
 
-def _is_label(x):
-    return isinstance(x, str) and not _isreg(x)
+# Encoding table shared by the emitter and asmy.disasm.chip8.
+# Operands are listed in the order the Python functions take them: "x"/"y"
+# are Vx/Vy registers, "kk"/"n"/"nnn" are byte, nibble and address fields
+# (addresses may be labels), anything else must match literally.
+# fmt: off
+ENCODINGS = [
+    # mnemonic  operands           opcode   syntax
+    ("CLS",  (),                  0x00E0, "CLS"),
+    ("RET",  (),                  0x00EE, "RET"),
+    ("SCD",  ("n",),              0x00C0, "SCD {n}"),
+    ("SCR",  (),                  0x00FB, "SCR"),
+    ("SCL",  (),                  0x00FC, "SCL"),
+    ("EXIT", (),                  0x00FD, "EXIT"),
+    ("LOW",  (),                  0x00FE, "LOW"),
+    ("HIGH", (),                  0x00FF, "HIGH"),
+    ("JP",   ("nnn",),            0x1000, "JP {nnn}"),
+    ("CALL", ("nnn",),            0x2000, "CALL {nnn}"),
+    ("SE",   ("x", "kk"),         0x3000, "SE {x}, {kk}"),
+    ("SNE",  ("x", "kk"),         0x4000, "SNE {x}, {kk}"),
+    ("SE",   ("x", "y"),          0x5000, "SE {x}, {y}"),
+    ("LD",   ("x", "kk"),         0x6000, "LD {x}, {kk}"),
+    ("ADD",  ("x", "kk"),         0x7000, "ADD {x}, {kk}"),
+    ("LD",   ("x", "y"),          0x8000, "LD {x}, {y}"),
+    ("OR",   ("x", "y"),          0x8001, "OR {x}, {y}"),
+    ("AND",  ("x", "y"),          0x8002, "AND {x}, {y}"),
+    ("XOR",  ("x", "y"),          0x8003, "XOR {x}, {y}"),
+    ("ADD",  ("x", "y"),          0x8004, "ADD {x}, {y}"),
+    ("SUB",  ("x", "y"),          0x8005, "SUB {x}, {y}"),
+    ("SHR",  ("x", "y"),          0x8006, "SHR {x}, {y}"),
+    ("SUBN", ("x", "y"),          0x8007, "SUBN {x}, {y}"),
+    ("SHL",  ("x", "y"),          0x800E, "SHL {x}, {y}"),
+    ("SNE",  ("x", "y"),          0x9000, "SNE {x}, {y}"),
+    ("LD",   ("I", "nnn"),        0xA000, "LD I, {nnn}"),
+    ("JP",   ("nnn", "V0"),       0xB000, "JP V0, {nnn}"),
+    ("RND",  ("x", "kk"),         0xC000, "RND {x}, {kk}"),
+    ("DRW",  ("x", "y", "n"),     0xD000, "DRW {x}, {y}, {n}"),
+    ("SKP",  ("x",),              0xE09E, "SKP {x}"),
+    ("SKNP", ("x",),              0xE0A1, "SKNP {x}"),
+    ("LD",   ("x", "DT"),         0xF007, "LD {x}, DT"),
+    ("LD",   ("x", "K"),          0xF00A, "LD {x}, K"),
+    ("LD",   ("DT", "x"),         0xF015, "LD DT, {x}"),
+    ("LD",   ("ST", "x"),         0xF018, "LD ST, {x}"),
+    ("ADD",  ("x", "I"),          0xF01E, "ADD I, {x}"),
+    ("LD",   ("F", "x"),          0xF029, "LD F, {x}"),
+    ("LD",   ("HF", "x"),         0xF030, "LD HF, {x}"),
+    ("LD",   ("B", "x"),          0xF033, "LD B, {x}"),
+    ("LD",   ("I", "x"),          0xF055, "LD [I], {x}"),
+    ("LD",   ("x", "I"),          0xF065, "LD {x}, [I]"),
+    ("LD",   ("R", "x"),          0xF075, "LD R, {x}"),
+    ("LD",   ("x", "R"),          0xF085, "LD {x}, R"),
+]
+# fmt: on
+
+# Bits of the opcode holding each operand field
+FIELDS = {"x": 0x0F00, "y": 0x00F0, "kk": 0x00FF, "n": 0x000F, "nnn": 0x0FFF}
+
+_ENCODE = {}
+for _name, _operands, _op, _ in ENCODINGS:
+    _ENCODE.setdefault(_name, []).append((_operands, _op))
+
+
+def _emit(name, *args):
+    for operands, op in _ENCODE[name]:
+        if len(operands) != len(args):
+            continue
+        ref = None
+        for kind, arg in zip(operands, args):
+            if kind == "x" or kind == "y":
+                if not _isreg(arg):
+                    break
+                op |= _reg(arg) << (8 if kind == "x" else 4)
+            elif kind in FIELDS:
+                if isinstance(arg, int):
+                    op |= arg & FIELDS[kind]
+                elif kind == "nnn" and _is_label(arg):
+                    ref = arg
+                else:
+                    break
+            elif arg != kind:
+                break
+        else:
+            if ref is None:
+                dw(op)
+            else:
+                asm.fixup(ref, 2, CHIP8, op)
+            return
+    raise ValueError(f"Invalid operands for {name}: {', '.join(map(str, args))}")
 
 
 def add(x, y):
@@ -36,41 +121,28 @@ def add(x, y):
     ADD Vx, Vy      8xy4
     ADD Vx, byte    7xkk
     """
-    if _isreg(x):
-        if y == I:
-            dw(0xF01E | (_reg(x) << 8))
-        elif _isreg(y):
-            dw(0x8004 | (_reg(x) << 8) | (_reg(y) << 4))
-        elif isinstance(y, int):
-            dw(0x7000 | (_reg(x) << 8) | (y & 0xFF))
-        else:
-            raise ValueError("Invalid add operands")
-    else:
-        raise ValueError("Invalid add destination")
+    _emit("ADD", x, y)
 
 
 def band(x, y):
     """
     AND Vx, Vy      8xy2
     """
-    dw(0x8002 | (_reg(x) << 8) | (_reg(y) << 4))
+    _emit("AND", x, y)
 
 
 def call(addr):
     """
     CALL addr       2nnn
     """
-    if _is_label(addr):
-        asm.fixup(addr, 2, _patch(0x2000))
-    else:
-        dw(0x2000 | (addr & 0xFFF))
+    _emit("CALL", addr)
 
 
 def cls():
     """
     CLS             00E0
     """
-    dw(0x00E0)
+    _emit("CLS")
 
 
 def drw(x, y, n=0):
@@ -78,7 +150,7 @@ def drw(x, y, n=0):
     DRW Vx, Vy, 0   Dxy0
     DRW Vx, Vy, n   Dxyn
     """
-    dw(0xD000 | (_reg(x) << 8) | (_reg(y) << 4) | (n & 0xF))
+    _emit("DRW", x, y, n)
 
 
 def jp(addr, v0=None):
@@ -86,19 +158,10 @@ def jp(addr, v0=None):
     JP addr, V0     Bnnn
     JP addr         1nnn
     """
-    if v0 is not None:
-        if not v0 == V0:
-            raise ValueError("Invalid JP V0, addr")
-        if _is_label(addr):
-            asm.fixup(addr, 2, _patch(0xB000))
-        else:
-            dw(0xB000 | (addr & 0xFFF))
-    elif _is_label(addr):
-        asm.fixup(addr, 2, _patch(0x1000))
-    elif isinstance(addr, int):
-        dw(0x1000 | (addr & 0xFFF))
+    if v0 is None:
+        _emit("JP", addr)
     else:
-        raise ValueError(f"Invalid JP address: {addr}")
+        _emit("JP", addr, v0)
 
 
 def ld(x, y):
@@ -118,65 +181,28 @@ def ld(x, y):
     LD HF, Vx       Fx30
     LD R,  Vx       Fx75
     """
-    if _isreg(x):
-        if isinstance(y, int):
-            dw(0x6000 | (_reg(x) << 8) | (y & 0xFF))
-        elif _isreg(y):
-            dw(0x8000 | (_reg(x) << 8) | (_reg(y) << 4))
-        elif y == DT:
-            dw(0xF007 | (_reg(x) << 8))
-        elif y == K:
-            dw(0xF00A | (_reg(x) << 8))
-        elif y == R:
-            dw(0xF085 | (_reg(x) << 8))
-        elif y == I:
-            dw(0xF065 | (_reg(x) << 8))
-        else:
-            raise ValueError("Invalid ld source for register")
-    elif x == I:
-        if _isreg(y):
-            dw(0xF055 | (_reg(y) << 8))
-        elif _is_label(y):
-            asm.fixup(y, 2, _patch(0xA000))
-        elif isinstance(y, int):
-            dw(0xA000 | (y & 0xFFF))
-        else:
-            raise ValueError("Invalid ld destination I")
-    elif x == F:
-        dw(0xF029 | (_reg(y) << 8))
-    elif x == B:
-        dw(0xF033 | (_reg(y) << 8))
-    elif x == DT:
-        dw(0xF015 | (_reg(y) << 8))
-    elif x == ST:
-        dw(0xF018 | (_reg(y) << 8))
-    elif x == HF:
-        dw(0xF030 | (_reg(y) << 8))
-    elif x == R:
-        dw(0xF075 | (_reg(y) << 8))
-    else:
-        raise ValueError("Invalid ld operands")
+    _emit("LD", x, y)
 
 
 def bor(x, y):
     """
     OR Vx, Vy       8xy1
     """
-    dw(0x8001 | (_reg(x) << 8) | (_reg(y) << 4))
+    _emit("OR", x, y)
 
 
 def ret():
     """
     RET             00EE
     """
-    dw(0x00EE)
+    _emit("RET")
 
 
 def rnd(x, n):
     """
     RND Vx, byte    Cxkk
     """
-    dw(0xC000 | (_reg(x) << 8) | (n & 0xFF))
+    _emit("RND", x, n)
 
 
 def se(x, y):
@@ -184,40 +210,35 @@ def se(x, y):
     SE Vx, Vy       5xy0
     SE Vx, byte     3xkk
     """
-    if _isreg(x) and _isreg(y):
-        dw(0x5000 | (_reg(x) << 8) | (_reg(y) << 4))
-    elif _isreg(x) and isinstance(y, int):
-        dw(0x3000 | (_reg(x) << 8) | (y & 0xFF))
-    else:
-        raise ValueError("Invalid operands for se")
+    _emit("SE", x, y)
 
 
-def shl(x, y=0):
+def shl(x, y=V0):
     """
     SHL Vx {, Vy}   8xyE
     """
-    dw(0x800E | (_reg(x) << 8) | (_reg(y) << 4))
+    _emit("SHL", x, y)
 
 
-def shr(x, y=0):
+def shr(x, y=V0):
     """
     SHR Vx {, Vy}   8xy6
     """
-    dw(0x8006 | (_reg(x) << 8) | (_reg(y) << 4))
+    _emit("SHR", x, y)
 
 
 def sknp(x):
     """
     SKNP Vx         ExA1
     """
-    dw(0xE0A1 | (_reg(x) << 8))
+    _emit("SKNP", x)
 
 
 def skp(x):
     """
     SKP Vx          Ex9E
     """
-    dw(0xE09E | (_reg(x) << 8))
+    _emit("SKP", x)
 
 
 def sne(x, y):
@@ -225,26 +246,21 @@ def sne(x, y):
     SNE Vx, Vy      9xy0
     SNE Vx, byte    4xkk
     """
-    if _isreg(x) and _isreg(y):
-        dw(0x9000 | (_reg(x) << 8) | (_reg(y) << 4))
-    elif _isreg(x) and isinstance(y, int):
-        dw(0x4000 | (_reg(x) << 8) | (y & 0xFF))
-    else:
-        raise ValueError("Invalid operands for sne")
+    _emit("SNE", x, y)
 
 
 def sub(x, y):
     """
     SUB Vx, Vy      8xy5
     """
-    dw(0x8005 | (_reg(x) << 8) | (_reg(y) << 4))
+    _emit("SUB", x, y)
 
 
 def subn(x, y):
     """
     SUBN Vx, Vy     8xy7
     """
-    dw(0x8007 | (_reg(x) << 8) | (_reg(y) << 4))
+    _emit("SUBN", x, y)
 
 
 #  SYS addr               0nnn
@@ -254,7 +270,7 @@ def xor(x, y):
     """
     XOR Vx, Vy      8xy3
     """
-    dw(0x8003 | (_reg(x) << 8) | (_reg(y) << 4))
+    _emit("XOR", x, y)
 
 
 #
@@ -264,33 +280,34 @@ def xor(x, y):
 
 def scd(n):
     """SCD nibble  00Cn"""
-    dw(0x00C0 | (n & 0xF))
+    _emit("SCD", n)
 
 
 def scr():
     """SCR         00FB"""
-    dw(0x00FB)
+    _emit("SCR")
 
 
 def scl():
     """SCL         00FC"""
-    dw(0x00FC)
+    _emit("SCL")
 
 
 def exit():
     """EXIT        00FD"""
-    dw(0x00FD)
+    _emit("EXIT")
 
 
 def low():
     """LOW         00FE"""
-    dw(0x00FE)
+    _emit("LOW")
 
 
 def high():
     """HIGH        00FF"""
-    dw(0x00FF)
+    _emit("HIGH")
 
 
 # fmt: off
 ADD, AND, CALL, CLS, DRW, JP, LD, OR, RET, RND, SE, SHL, SHR, SKNP, SKP, SNE, SUB, SUBN, XOR = add, band, call, cls, drw, jp, ld, bor, ret, rnd, se, shl, shr, sknp, skp, sne, sub, subn, xor
+SCD, SCR, SCL, EXIT, LOW, HIGH = scd, scr, scl, exit, low, high
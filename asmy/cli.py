@@ -0,0 +1,141 @@
+import argparse
+import importlib
+import os
+import runpy
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from . import output, parse
+from .batch import _module
+
+EXTENSIONS = {"raw": ".bin", "hex": ".hex", "ihex": ".ihx", "srec": ".srec"}
+
+
+def _hex(chunks, out):
+    # One line of 16 bytes each, as read by Verilog's $readmemh
+    for base, data in chunks:
+        out.write(f"@{base:04X}\n")
+        for i in range(0, len(data), 16):
+            out.write(data[i : i + 16].hex(" ") + "\n")
+
+
+WRITERS = {"hex": _hex, "ihex": output.ihex, "srec": output.srec}
+
+
+def assemble(arch, program, target, fmt="raw"):
+    """Assemble one program for arch and write it to target in fmt.
+
+    A program is either a Python script emitting into the architecture's
+    `asm` or an assembly source file read by asmy.parse. Returns the size
+    of the image.
+    """
+    module = importlib.import_module(arch)
+    with module.asm.new() as a:
+        if program.endswith(".py"):
+            runpy.run_path(program, run_name="__asmy__")
+        else:
+            parse.assemble_file(program, module)
+        if fmt == "raw":
+            rom = a.finalize()
+            size = len(rom)
+        else:
+            chunks = a.finalize(chunks=True)
+            size = sum(len(data) for _, data in chunks)
+    tmp = target + ".tmp"
+    with open(tmp, "wb" if fmt == "raw" else "w") as f:
+        if fmt == "raw":
+            f.write(rom)
+        else:
+            WRITERS[fmt](chunks, f)
+    os.replace(tmp, target)
+    return size
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _result(fn):
+    try:
+        return fn()
+    except Exception as e:
+        return e
+
+
+def _run(pool, args, programs, outputs):
+    jobs = [(args.arch, p, outputs[p], args.format) for p in programs]
+    # Build in this process when there is nothing to spread out, which also
+    # keeps the architecture module warm across rebuilds in watch mode
+    if pool is None:
+        results = [_result(partial(assemble, *job)) for job in jobs]
+    else:
+        futures = [pool.submit(assemble, *job) for job in jobs]
+        results = [_result(f.result) for f in futures]
+    ok = True
+    for program, result in zip(programs, results):
+        if isinstance(result, Exception):
+            ok = False
+            print(f"{program}: {result}", file=sys.stderr)
+        elif args.verbose:
+            print(f"{program} -> {outputs[program]} ({result} bytes)")
+    return ok
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(
+        prog="asmy", description="Assemble Python or assembly source programs."
+    )
+    p.add_argument("programs", nargs="+", help="*.py scripts or assembly sources")
+    p.add_argument("-a", "--arch", required=True, help="e.g. chip8, mos6502")
+    p.add_argument("-f", "--format", choices=EXTENSIONS, default="raw")
+    p.add_argument("-o", "--output", help="output file, or directory for many")
+    p.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1)
+    p.add_argument("-w", "--watch", action="store_true", help="rebuild on changes")
+    p.add_argument("--interval", type=float, default=0.05, help="watch poll seconds")
+    p.add_argument("-v", "--verbose", action="store_true")
+    args = p.parse_args(argv)
+    args.arch = _module(args.arch)
+    importlib.import_module(args.arch)
+
+    outputs = {}
+    for program in args.programs:
+        name = os.path.splitext(program)[0] + EXTENSIONS[args.format]
+        if args.output is None:
+            outputs[program] = name
+        elif len(args.programs) == 1 and not os.path.isdir(args.output):
+            outputs[program] = args.output
+        else:
+            os.makedirs(args.output, exist_ok=True)
+            outputs[program] = os.path.join(args.output, os.path.basename(name))
+
+    workers = min(args.jobs, len(args.programs))
+    pool = None
+    if workers > 1:
+        pool = ProcessPoolExecutor(
+            workers, initializer=importlib.import_module, initargs=(args.arch,)
+        )
+    try:
+        mtimes = {program: _mtime(program) for program in args.programs}
+        ok = _run(pool, args, args.programs, outputs)
+        if not args.watch:
+            return 0 if ok else 1
+        while True:
+            time.sleep(args.interval)
+            changed = []
+            for program, mtime in mtimes.items():
+                current = _mtime(program)
+                if current != mtime and current is not None:
+                    mtimes[program] = current
+                    changed.append(program)
+            if changed:
+                _run(pool, args, changed, outputs)
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        if pool is not None:
+            pool.shutdown()
@@ -0,0 +1,65 @@
+from ..chip8 import ENCODINGS, FIELDS
+
+
+def _mask(operands):
+    mask = 0xFFFF
+    for kind in operands:
+        mask &= ~FIELDS.get(kind, 0)
+    return mask
+
+
+# Candidate (mask, opcode, entry) lists indexed by the high nibble, most
+# specific masks first
+DECODE = [[] for _ in range(16)]
+for _entry in ENCODINGS:
+    DECODE[_entry[2] >> 12].append((_mask(_entry[1]), _entry[2], _entry))
+for _bucket in DECODE:
+    _bucket.sort(key=lambda c: -bin(c[0]).count("1"))
+
+
+def decode(op):
+    """Decode a 16-bit opcode into (mnemonic, args, syntax, fields).
+
+    args are in the order the asmy.chip8 functions take them, so
+    getattr(asmy.chip8, mnemonic)(*args) re-emits the same opcode.
+    Returns None for opcodes not in the encoding table.
+    """
+    for mask, value, (name, operands, _, syntax) in DECODE[op >> 12]:
+        if op & mask == value:
+            fields = {
+                "x": f"V{op >> 8 & 0xF:X}",
+                "y": f"V{op >> 4 & 0xF:X}",
+                "kk": op & 0xFF,
+                "n": op & 0xF,
+                "nnn": op & 0xFFF,
+            }
+            args = tuple(fields.get(kind, kind) for kind in operands)
+            return name, args, syntax, fields
+    return None
+
+
+def disasm(rom, pc_start=0x200, labels=None):
+    """Lazily disassemble CHIP-8/SCHIP code.
+
+    Yields (address, raw, text) per 2-byte word, with raw a memoryview slice
+    of rom. Addresses found in labels are printed by name. Words that are
+    not valid opcodes yield ".dw" lines and a trailing odd byte a ".db".
+    """
+    mem = memoryview(rom)
+    names = {addr: name for name, addr in (labels or {}).items()}
+    end = len(mem) & ~1
+    for pos in range(0, end, 2):
+        addr = pc_start + pos
+        op = mem[pos] << 8 | mem[pos + 1]
+        decoded = decode(op)
+        if decoded is None:
+            text = f".dw ${op:04X}"
+        else:
+            _, _, syntax, fields = decoded
+            nnn = fields["nnn"]
+            fields["nnn"] = names.get(nnn, f"${nnn:03X}")
+            fields["kk"] = f"${fields['kk']:02X}"
+            text = syntax.format(**fields)
+        yield addr, mem[pos : pos + 2], text
+    if end < len(mem):
+        yield pc_start + end, mem[end:], f".db ${mem[end]:02X}"
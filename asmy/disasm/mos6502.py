@@ -0,0 +1,72 @@
+from ..mos6502 import OPCODES, SIZES
+
+# (mnemonic, mode, size) for each opcode, derived from the assembler tables
+DECODE = [None] * 256
+for _name, _modes in OPCODES.items():
+    for _mode, _op in _modes.items():
+        DECODE[_op] = (_name, _mode, SIZES[_mode])
+
+_FORMATS = {
+    "imp": "{}",
+    "acc": "{} A",
+    "imm": "{} #{}",
+    "rel": "{} {}",
+    "zpg": "{} {}",
+    "zpx": "{} {},X",
+    "zpy": "{} {},Y",
+    "abs": "{} {}",
+    "abx": "{} {},X",
+    "aby": "{} {},Y",
+    "ind": "{} ({})",
+    "inx": "{} ({},X)",
+    "iny": "{} ({}),Y",
+}
+
+
+def disasm(rom, pc_start=0, labels=None):
+    """Lazily disassemble 6502 code.
+
+    Yields (address, raw, text) for each instruction, where raw is a
+    memoryview slice of rom (no copy). Addresses found in labels (a name to
+    address map such as Assembler.labels) are printed by name. Bytes that
+    are not valid opcodes, or truncated instructions, yield ".db" lines.
+    """
+    mem = memoryview(rom)
+    names = {addr: name for name, addr in (labels or {}).items()}
+    pos, end = 0, len(mem)
+    while pos < end:
+        addr = pc_start + pos
+        entry = DECODE[mem[pos]]
+        if entry is None or pos + entry[2] > end:
+            yield addr, mem[pos : pos + 1], f".db ${mem[pos]:02X}"
+            pos += 1
+            continue
+        name, mode, size = entry
+        if size == 1:
+            operand = None
+        elif mode == "imm":
+            operand = f"${mem[pos + 1]:02X}"
+        else:
+            if size == 2:
+                value = mem[pos + 1]
+                if mode == "rel":
+                    value = (addr + 2 + value - (0x100 if value & 0x80 else 0)) & 0xFFFF
+            else:
+                value = mem[pos + 1] | mem[pos + 2] << 8
+            operand = names.get(value)
+            if operand is None:
+                width = 2 if size == 2 and mode != "rel" else 4
+                operand = f"${value:0{width}X}"
+        yield addr, mem[pos : pos + size], _FORMATS[mode].format(name, operand)
+        pos += size
+
+
+def dump(rom, out, pc_start=0, labels=None):
+    """Write a disassembly listing with label lines to a text file."""
+    names = {}
+    for name, addr in (labels or {}).items():
+        names.setdefault(addr, []).append(name)
+    for addr, raw, text in disasm(rom, pc_start, labels):
+        for name in names.get(addr, ()):
+            out.write(f"{name}:\n")
+        out.write(f"{addr:04X}  {raw.hex(' '):<8}  {text}\n")
@@ -0,0 +1,269 @@
+import random
+
+# fmt: off
+FONT = bytes([
+    0xF0, 0x90, 0x90, 0x90, 0xF0, 0x20, 0x60, 0x20, 0x20, 0x70,  # 0 1
+    0xF0, 0x10, 0xF0, 0x80, 0xF0, 0xF0, 0x10, 0xF0, 0x10, 0xF0,  # 2 3
+    0x90, 0x90, 0xF0, 0x10, 0x10, 0xF0, 0x80, 0xF0, 0x10, 0xF0,  # 4 5
+    0xF0, 0x80, 0xF0, 0x90, 0xF0, 0xF0, 0x10, 0x20, 0x40, 0x40,  # 6 7
+    0xF0, 0x90, 0xF0, 0x90, 0xF0, 0xF0, 0x90, 0xF0, 0x10, 0xF0,  # 8 9
+    0xF0, 0x90, 0xF0, 0x90, 0x90, 0xE0, 0x90, 0xE0, 0x90, 0xE0,  # A B
+    0xF0, 0x80, 0x80, 0x80, 0xF0, 0xE0, 0x90, 0x90, 0x90, 0xE0,  # C D
+    0xF0, 0x80, 0xF0, 0x80, 0xF0, 0xF0, 0x80, 0xF0, 0x80, 0x80,  # E F
+])
+
+BIG_FONT = bytes([
+    0xFF, 0xFF, 0xC3, 0xC3, 0xC3, 0xC3, 0xC3, 0xC3, 0xFF, 0xFF,  # 0
+    0x18, 0x78, 0x78, 0x18, 0x18, 0x18, 0x18, 0x18, 0xFF, 0xFF,  # 1
+    0xFF, 0xFF, 0x03, 0x03, 0xFF, 0xFF, 0xC0, 0xC0, 0xFF, 0xFF,  # 2
+    0xFF, 0xFF, 0x03, 0x03, 0xFF, 0xFF, 0x03, 0x03, 0xFF, 0xFF,  # 3
+    0xC3, 0xC3, 0xC3, 0xC3, 0xFF, 0xFF, 0x03, 0x03, 0x03, 0x03,  # 4
+    0xFF, 0xFF, 0xC0, 0xC0, 0xFF, 0xFF, 0x03, 0x03, 0xFF, 0xFF,  # 5
+    0xFF, 0xFF, 0xC0, 0xC0, 0xFF, 0xFF, 0xC3, 0xC3, 0xFF, 0xFF,  # 6
+    0xFF, 0xFF, 0x03, 0x03, 0x06, 0x0C, 0x18, 0x18, 0x18, 0x18,  # 7
+    0xFF, 0xFF, 0xC3, 0xC3, 0xFF, 0xFF, 0xC3, 0xC3, 0xFF, 0xFF,  # 8
+    0xFF, 0xFF, 0xC3, 0xC3, 0xFF, 0xFF, 0x03, 0x03, 0xFF, 0xFF,  # 9
+])
+# fmt: on
+
+FONT_ADDR, BIG_FONT_ADDR = 0x000, 0x050
+
+
+class VM:
+    """CHIP-8/SCHIP virtual machine.
+
+    The display is a list of rows, each row packed into a single integer
+    with the leftmost pixel in the most significant bit, so sprite drawing,
+    collision checks and scrolling are whole-row integer operations.
+    """
+
+    def __init__(self, rom=b"", pc_start=0x200, seed=None):
+        self.mem = bytearray(0x1000)
+        self.mem[FONT_ADDR : FONT_ADDR + len(FONT)] = FONT
+        self.mem[BIG_FONT_ADDR : BIG_FONT_ADDR + len(BIG_FONT)] = BIG_FONT
+        self.mem[pc_start : pc_start + len(rom)] = rom
+        self.v = bytearray(16)
+        self.rpl = bytearray(16)
+        self.i = 0
+        self.pc = pc_start
+        self.stack = []
+        self.dt = self.st = 0
+        self.keys = 0
+        self.halted = False
+        self.random = random.Random(seed)
+        self.resize(64, 32)
+        self.ops = [getattr(self, f"_op{n:X}") for n in range(16)]
+        self.alu = [getattr(self, f"_alu{n:X}", self._illegal) for n in range(16)]
+
+    def resize(self, width, height):
+        """Switch display resolution, clearing the screen."""
+        self.width, self.height = width, height
+        self.mask = (1 << width) - 1
+        self.screen = [0] * height
+
+    def pixel(self, x, y):
+        return self.screen[y] >> (self.width - 1 - x) & 1
+
+    def render(self, on="#", off="."):
+        """Return the display as text, one line per row."""
+        w = self.width
+        return "\n".join(
+            format(row, f"0{w}b").replace("0", off).replace("1", on)
+            for row in self.screen
+        )
+
+    def step(self):
+        """Execute a single instruction."""
+        pc = self.pc
+        op = self.mem[pc] << 8 | self.mem[(pc + 1) & 0xFFF]
+        self.pc = (pc + 2) & 0xFFF
+        self.ops[op >> 12](op)
+
+    def frame(self, ipf=10):
+        """Run one 60 Hz frame of ipf instructions, then tick the timers."""
+        step = self.step
+        for _ in range(ipf):
+            if self.halted:
+                break
+            step()
+        if self.dt:
+            self.dt -= 1
+        if self.st:
+            self.st -= 1
+
+    def run(self, frames, ipf=10):
+        """Run headless for the given number of frames or until EXIT."""
+        for _ in range(frames):
+            if self.halted:
+                break
+            self.frame(ipf)
+
+    def _illegal(self, op):
+        raise ValueError(f"Illegal opcode {op:04X} at {(self.pc - 2) & 0xFFF:03X}")
+
+    def _draw(self, x, y, n):
+        w, h, mem, screen = self.width, self.height, self.mem, self.screen
+        x, y = x % w, y % h
+        if n == 0:
+            data = mem[self.i : self.i + 32]
+            sw, rows = 16, [data[k] << 8 | data[k + 1] for k in range(0, 32, 2)]
+        else:
+            sw, rows = 8, mem[self.i : self.i + n]
+        shift = w - sw - x
+        hit = 0
+        for k, bits in enumerate(rows):
+            if y + k >= h:
+                break
+            bits = bits << shift if shift >= 0 else bits >> -shift
+            row = screen[y + k]
+            hit |= row & bits
+            screen[y + k] = row ^ bits
+        self.v[15] = 1 if hit else 0
+
+    def _op0(self, op):
+        if op == 0x00E0:
+            self.screen = [0] * self.height
+        elif op == 0x00EE:
+            self.pc = self.stack.pop()
+        elif op & 0xFFF0 == 0x00C0:
+            n = op & 0xF
+            self.screen = [0] * n + self.screen[: self.height - n]
+        elif op == 0x00FB:
+            self.screen = [row >> 4 for row in self.screen]
+        elif op == 0x00FC:
+            mask = self.mask
+            self.screen = [(row << 4) & mask for row in self.screen]
+        elif op == 0x00FD:
+            self.halted = True
+        elif op == 0x00FE:
+            self.resize(64, 32)
+        elif op == 0x00FF:
+            self.resize(128, 64)
+        else:
+            self._illegal(op)
+
+    def _op1(self, op):
+        self.pc = op & 0xFFF
+
+    def _op2(self, op):
+        self.stack.append(self.pc)
+        self.pc = op & 0xFFF
+
+    def _op3(self, op):
+        if self.v[op >> 8 & 0xF] == op & 0xFF:
+            self.pc = (self.pc + 2) & 0xFFF
+
+    def _op4(self, op):
+        if self.v[op >> 8 & 0xF] != op & 0xFF:
+            self.pc = (self.pc + 2) & 0xFFF
+
+    def _op5(self, op):
+        if self.v[op >> 8 & 0xF] == self.v[op >> 4 & 0xF]:
+            self.pc = (self.pc + 2) & 0xFFF
+
+    def _op6(self, op):
+        self.v[op >> 8 & 0xF] = op & 0xFF
+
+    def _op7(self, op):
+        x = op >> 8 & 0xF
+        self.v[x] = (self.v[x] + op) & 0xFF
+
+    def _op8(self, op):
+        self.alu[op & 0xF](op >> 8 & 0xF, op >> 4 & 0xF)
+
+    def _op9(self, op):
+        if self.v[op >> 8 & 0xF] != self.v[op >> 4 & 0xF]:
+            self.pc = (self.pc + 2) & 0xFFF
+
+    def _opA(self, op):
+        self.i = op & 0xFFF
+
+    def _opB(self, op):
+        self.pc = (self.v[0] + op) & 0xFFF
+
+    def _opC(self, op):
+        self.v[op >> 8 & 0xF] = self.random.getrandbits(8) & op
+
+    def _opD(self, op):
+        self._draw(self.v[op >> 8 & 0xF], self.v[op >> 4 & 0xF], op & 0xF)
+
+    def _opE(self, op):
+        pressed = self.keys >> (self.v[op >> 8 & 0xF] & 0xF) & 1
+        if (op & 0xFF == 0x9E and pressed) or (op & 0xFF == 0xA1 and not pressed):
+            self.pc = (self.pc + 2) & 0xFFF
+        elif op & 0xFF not in (0x9E, 0xA1):
+            self._illegal(op)
+
+    def _opF(self, op):
+        x, kk, v, mem = op >> 8 & 0xF, op & 0xFF, self.v, self.mem
+        if kk == 0x07:
+            v[x] = self.dt
+        elif kk == 0x0A:
+            if self.keys:
+                v[x] = (self.keys & -self.keys).bit_length() - 1
+            else:
+                self.pc = (self.pc - 2) & 0xFFF
+        elif kk == 0x15:
+            self.dt = v[x]
+        elif kk == 0x18:
+            self.st = v[x]
+        elif kk == 0x1E:
+            self.i = (self.i + v[x]) & 0xFFF
+        elif kk == 0x29:
+            self.i = FONT_ADDR + (v[x] & 0xF) * 5
+        elif kk == 0x30:
+            self.i = BIG_FONT_ADDR + (v[x] % 10) * 10
+        elif kk == 0x33:
+            for k, d in enumerate((v[x] // 100, v[x] // 10 % 10, v[x] % 10)):
+                mem[(self.i + k) & 0xFFF] = d
+        elif kk == 0x55:
+            for k in range(x + 1):
+                mem[(self.i + k) & 0xFFF] = v[k]
+        elif kk == 0x65:
+            for k in range(x + 1):
+                v[k] = mem[(self.i + k) & 0xFFF]
+        elif kk == 0x75:
+            self.rpl[: x + 1] = v[: x + 1]
+        elif kk == 0x85:
+            v[: x + 1] = self.rpl[: x + 1]
+        else:
+            self._illegal(op)
+
+    # 8xyN arithmetic, SCHIP semantics: shifts operate on Vx in place
+
+    def _alu0(self, x, y):
+        self.v[x] = self.v[y]
+
+    def _alu1(self, x, y):
+        self.v[x] |= self.v[y]
+
+    def _alu2(self, x, y):
+        self.v[x] &= self.v[y]
+
+    def _alu3(self, x, y):
+        self.v[x] ^= self.v[y]
+
+    def _alu4(self, x, y):
+        r = self.v[x] + self.v[y]
+        self.v[x] = r & 0xFF
+        self.v[15] = r >> 8
+
+    def _alu5(self, x, y):
+        vx, vy = self.v[x], self.v[y]
+        self.v[x] = (vx - vy) & 0xFF
+        self.v[15] = 1 if vx >= vy else 0
+
+    def _alu6(self, x, y):
+        vx = self.v[x]
+        self.v[x] = vx >> 1
+        self.v[15] = vx & 1
+
+    def _alu7(self, x, y):
+        vx, vy = self.v[x], self.v[y]
+        self.v[x] = (vy - vx) & 0xFF
+        self.v[15] = 1 if vy >= vx else 0
+
+    def _aluE(self, x, y):
+        vx = self.v[x]
+        self.v[x] = (vx << 1) & 0xFF
+        self.v[15] = vx >> 7
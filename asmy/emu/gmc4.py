@@ -0,0 +1,215 @@
+import time
+
+MEM_SIZE = 0x60  # 0x00-0x4F program, 0x50-0x5F data
+DATA = 0x50
+
+# Binary LEDs shown by DSPR
+LEDS_LO, LEDS_HI = 0x5E, 0x5F
+
+
+class GMC4:
+    """Gakken GMC-4 simulator.
+
+    Memory is kept as packed nibbles, two per byte. With fast=True TIMR and
+    sound routines only advance the virtual clock instead of sleeping.
+    """
+
+    def __init__(self, program=b"", fast=False):
+        self.mem = bytearray(MEM_SIZE // 2)
+        for addr, v in enumerate(program):
+            self.poke(addr, v)
+        self.a = self.b = self.y = self.z = 0
+        self.alt = [0, 0, 0, 0]  # A', B', Y', Z'
+        self.flag = 1
+        self.pc = 0
+        self.key = None  # currently pressed key, 0-15
+        self.digit = None  # value shown on the 7-segment display
+        self.leds = 0  # 7 binary LEDs, bit n is LED n
+        self.sounds = []  # (name, value) of every sound routine played
+        self.time = 0.0  # seconds spent in TIMR and sound routines
+        self.fast = fast
+        self.ops = [getattr(self, f"_op{n:X}") for n in range(16)]
+        # fmt: off
+        self.calls = [
+            self._rsto, self._setr, self._rstr, self._nop,
+            self._cmpl, self._chng, self._sift, self._ends,
+            self._errs, self._shts, self._lons, self._sund,
+            self._timr, self._dspr, self._demm, self._demp,
+        ]
+        # fmt: on
+
+    def peek(self, addr):
+        b = self.mem[addr >> 1]
+        return b & 0xF if addr & 1 else b >> 4
+
+    def poke(self, addr, v):
+        i = addr >> 1
+        if addr & 1:
+            self.mem[i] = self.mem[i] & 0xF0 | (v & 0xF)
+        else:
+            self.mem[i] = self.mem[i] & 0x0F | (v & 0xF) << 4
+
+    def _fetch(self):
+        v = self.peek(self.pc)
+        self.pc = (self.pc + 1) % DATA
+        return v
+
+    def step(self):
+        """Execute a single instruction."""
+        self.ops[self._fetch()]()
+
+    def run(self, max_steps=None, until=None):
+        """Run until pc reaches until, a jump to itself or max_steps.
+
+        Returns the number of executed instructions.
+        """
+        steps = 0
+        while steps != max_steps and self.pc != until:
+            pc = self.pc
+            self.step()
+            steps += 1
+            if self.pc == pc:
+                break
+        return steps
+
+    def _wait(self, seconds):
+        self.time += seconds
+        if not self.fast:
+            time.sleep(seconds)
+
+    def _sound(self, name, value, seconds):
+        self.sounds.append((name, value))
+        self._wait(seconds)
+
+    #
+    # Instructions, dispatched on the opcode nibble
+    #
+
+    def _op0(self):  # KA
+        if self.key is None:
+            self.flag = 1
+        else:
+            self.a, self.flag = self.key, 0
+
+    def _op1(self):  # AO
+        self.digit, self.flag = self.a, 1
+
+    def _op2(self):  # CH
+        self.a, self.b, self.y, self.z = self.b, self.a, self.z, self.y
+        self.flag = 1
+
+    def _op3(self):  # CY
+        self.a, self.y, self.flag = self.y, self.a, 1
+
+    def _op4(self):  # AM
+        self.poke(DATA + self.y, self.a)
+        self.flag = 1
+
+    def _op5(self):  # MA
+        self.a, self.flag = self.peek(DATA + self.y), 1
+
+    def _op6(self):  # M+
+        r = self.peek(DATA + self.y) + self.a
+        self.a, self.flag = r & 0xF, r >> 4
+
+    def _op7(self):  # M-
+        r = self.peek(DATA + self.y) - self.a
+        self.a, self.flag = r & 0xF, int(r < 0)
+
+    def _op8(self):  # TIA n
+        self.a, self.flag = self._fetch(), 1
+
+    def _op9(self):  # AIA n
+        r = self.a + self._fetch()
+        self.a, self.flag = r & 0xF, r >> 4
+
+    def _opA(self):  # TIY n
+        self.y, self.flag = self._fetch(), 1
+
+    def _opB(self):  # AIY n
+        r = self.y + self._fetch()
+        self.y, self.flag = r & 0xF, r >> 4
+
+    def _opC(self):  # CIA n
+        self.flag = int(self.a != self._fetch())
+
+    def _opD(self):  # CIY n
+        self.flag = int(self.y != self._fetch())
+
+    def _opE(self):  # CAL n
+        self.flag = 1
+        self.calls[self._fetch()]()
+
+    def _opF(self):  # JUMP nn
+        addr = self._fetch() << 4
+        addr |= self._fetch()
+        if self.flag:
+            self.pc = addr
+        self.flag = 1
+
+    #
+    # Service routines, dispatched on the CAL argument
+    #
+
+    def _nop(self):
+        pass
+
+    def _rsto(self):
+        self.digit = None
+
+    def _setr(self):
+        if self.y < 7:
+            self.leds |= 1 << self.y
+
+    def _rstr(self):
+        if self.y < 7:
+            self.leds &= ~(1 << self.y)
+
+    def _cmpl(self):
+        self.a ^= 0xF
+
+    def _chng(self):
+        regs = [self.a, self.b, self.y, self.z]
+        self.a, self.b, self.y, self.z = self.alt
+        self.alt = regs
+
+    def _sift(self):
+        self.flag = int(not self.a & 1)
+        self.a >>= 1
+
+    def _ends(self):
+        self._sound("ends", None, 0.5)
+
+    def _errs(self):
+        self._sound("errs", None, 0.5)
+
+    def _shts(self):
+        self._sound("shts", None, 0.1)
+
+    def _lons(self):
+        self._sound("lons", None, 0.5)
+
+    def _sund(self):
+        self._sound("sund", self.a, 0.1)
+
+    def _timr(self):
+        self._wait((self.a + 1) * 0.1)
+
+    def _dspr(self):
+        self.leds = self.peek(LEDS_LO) | (self.peek(LEDS_HI) & 7) << 4
+
+    def _demm(self):
+        addr = DATA + self.y
+        r = self.peek(addr) - self.a
+        self.poke(addr, r + 10 if r < 0 else r)
+        self.y = (self.y - 1) & 0xF
+
+    def _demp(self):
+        addr = DATA + self.y
+        r = self.peek(addr) + self.a
+        if r >= 10:
+            r -= 10
+            if self.y:
+                self.poke(addr - 1, self.peek(addr - 1) + 1)
+        self.poke(addr, r)
+        self.y = (self.y - 1) & 0xF
@@ -0,0 +1,99 @@
+HLT, ADD, SUB, STA, LDA, BRA, BRZ, BRP, INP, OUT = range(10)
+
+_OPS = {1: ADD, 2: SUB, 3: STA, 5: LDA, 6: BRA, 7: BRZ, 8: BRP}
+
+
+def _decode(value):
+    if value == 901:
+        return INP, 0
+    if value == 902:
+        return OUT, 0
+    return _OPS.get(value // 100, HLT), value % 100
+
+
+def run(mem, inputs, max_steps=10000):
+    """Run a Little Man Computer program against one input stream.
+
+    mem is the mailbox image as returned by asmy.lmc.mem(). Returns the list
+    of output values, or None if the program did not halt within max_steps
+    or tried to read past the end of its input.
+    """
+    return run_batch(mem, [inputs], max_steps)[0]
+
+
+def run_batch(mem, batch, max_steps=10000):
+    """Run one program against many input streams at once.
+
+    All lanes start as a single group sharing one machine state. The state
+    only forks at INP, where the group is split by the value each lane
+    reads, so work is shared for as long as lanes consume the same input
+    prefix and every distinct execution path runs exactly once. One of the
+    new groups keeps the original state, so a group that does not split
+    copies nothing and the batch never costs more than calling run() for
+    each lane. Lanes with distinct inputs diverge at their first INP, so
+    the gain comes from repeated inputs and shared prefixes only.
+    """
+    batch = [list(inputs) for inputs in batch]
+    mem = list(mem) + [0] * (100 - len(mem))
+    code = [_decode(v) for v in mem]
+    results = [None] * len(batch)
+    groups = [(list(range(len(batch))), (0, 0, False, 0, [], mem, code, 0))]
+    while groups:
+        lanes, state = groups.pop()
+        out, state = _run(state, max_steps)
+        if state is None:
+            for lane in lanes:
+                results[lane] = None if out is None else list(out)
+            continue
+        # Blocked on INP: fork the state by the next input value of each lane
+        inp = state[3]
+        split = {}
+        for lane in lanes:
+            inputs = batch[lane]
+            if inp < len(inputs):
+                split.setdefault(inputs[inp] % 1000, []).append(lane)
+        acc, pc, neg, inp, out, mem, code, steps = state
+        last = len(split) - 1
+        for i, (value, group) in enumerate(split.items()):
+            if i < last:
+                fork = (value, pc, False, inp + 1, out[:], mem[:], code[:], steps)
+            else:
+                fork = (value, pc, False, inp + 1, out, mem, code, steps)
+            groups.append((group, fork))
+    return results
+
+
+def _run(state, max_steps):
+    """Run until HLT or INP, returning (out, None) or (None, state) at INP.
+
+    Returns (None, None) when the step budget is exhausted.
+    """
+    acc, pc, neg, inp, out, mem, code, steps = state
+    while steps < max_steps:
+        op, addr = code[pc]
+        pc = (pc + 1) % 100
+        steps += 1
+        if op == LDA:
+            acc, neg = mem[addr], False
+        elif op == ADD:
+            acc, neg = (acc + mem[addr]) % 1000, False
+        elif op == SUB:
+            acc, neg = (acc - mem[addr]) % 1000, acc < mem[addr]
+        elif op == STA:
+            mem[addr] = acc
+            code[addr] = _decode(acc)
+        elif op == BRA:
+            pc = addr
+        elif op == BRZ:
+            if acc == 0 and not neg:
+                pc = addr
+        elif op == BRP:
+            if not neg:
+                pc = addr
+        elif op == INP:
+            return None, (acc, pc, neg, inp, out, mem, code, steps)
+        elif op == OUT:
+            out.append(acc)
+        else:
+            return out, None
+    return None, None
@@ -0,0 +1,440 @@
+from functools import partial
+
+from ..mos6502 import OPCODES
+
+C, Z, I, D, B, U, V, N = 0x01, 0x02, 0x04, 0x08, 0x10, 0x20, 0x40, 0x80
+
+# N and Z flags for every byte value
+_NZ = bytes((v & N) | (0 if v else Z) for v in range(256))
+
+# fmt: off
+_READ = {"imm": 2, "zpg": 3, "zpx": 4, "zpy": 4, "abs": 4, "abx": 4, "aby": 4, "inx": 6, "iny": 5}
+_WRITE = {"zpg": 3, "zpx": 4, "zpy": 4, "abs": 4, "abx": 5, "aby": 5, "inx": 6, "iny": 6}
+_RMW = {"acc": 2, "zpg": 5, "zpx": 6, "abs": 6, "abx": 7}
+_IMPLIED = {"BRK": 7, "JSR": 6, "RTI": 6, "RTS": 6, "PHA": 3, "PHP": 3, "PLA": 4, "PLP": 4}
+# fmt: on
+
+# Instructions that take an extra cycle when indexing crosses a page
+_PENALTY = {"ADC", "AND", "CMP", "EOR", "LDA", "LDX", "LDY", "ORA", "SBC"}
+
+_BRANCHES = {
+    "BPL": (N, 0),
+    "BMI": (N, N),
+    "BVC": (V, 0),
+    "BVS": (V, V),
+    "BCC": (C, 0),
+    "BCS": (C, C),
+    "BNE": (Z, 0),
+    "BEQ": (Z, Z),
+}
+
+
+def _cycles(name, mode):
+    if name in ("STA", "STX", "STY"):
+        return _WRITE[mode]
+    if name in ("ASL", "LSR", "ROL", "ROR", "INC", "DEC"):
+        return _RMW[mode]
+    if name == "JMP":
+        return 3 if mode == "abs" else 5
+    if name == "JSR":
+        return 6
+    if mode in ("imp", "rel"):
+        return _IMPLIED.get(name, 2)
+    return _READ[mode]
+
+
+# Base cycle count for every opcode asmy.mos6502 can emit
+CYCLES = [0] * 256
+for _name, _modes in OPCODES.items():
+    for _mode, _op in _modes.items():
+        CYCLES[_op] = _cycles(_name, _mode)
+
+
+class CPU:
+    """NMOS 6502 core with a flat 64K memory and per-opcode cycle counts."""
+
+    def __init__(self, mem=None):
+        self.mem = bytearray(0x10000) if mem is None else mem
+        self.a = self.x = self.y = 0
+        self.sp = 0xFD
+        self.p = U | I
+        self.pc = 0
+        self.cycles = 0
+        self.traps = {}  # JSR target -> fn(cpu), see asmy.emu.sweet16
+        self.ops = [self._illegal] * 256
+        for name, modes in OPCODES.items():
+            for mode, op in modes.items():
+                self.ops[op] = self._handler(name, mode)
+
+    def load(self, rom, addr=0):
+        """Copy rom into memory at addr."""
+        self.mem[addr : addr + len(rom)] = rom
+
+    def reset(self):
+        """Jump through the reset vector."""
+        self.pc = self.mem[0xFFFC] | self.mem[0xFFFD] << 8
+        self.sp = 0xFD
+        self.p = U | I
+        self.cycles = 0
+
+    def step(self):
+        """Execute a single instruction."""
+        pc = self.pc
+        self.pc = (pc + 1) & 0xFFFF
+        op = self.mem[pc]
+        self.ops[op]()
+        self.cycles += CYCLES[op]
+
+    def run(self, pc=None, max_steps=None):
+        """Run until BRK, a jump to itself or max_steps instructions.
+
+        Returns the number of executed instructions. On BRK the program
+        counter is left pointing at the BRK opcode.
+        """
+        if pc is not None:
+            self.pc = pc
+        mem, ops = self.mem, self.ops
+        steps = cycles = 0
+        try:
+            while steps != max_steps:
+                pc = self.pc
+                op = mem[pc]
+                if op == 0x00:
+                    break
+                self.pc = (pc + 1) & 0xFFFF
+                ops[op]()
+                cycles += CYCLES[op]
+                steps += 1
+                if self.pc == pc:
+                    break
+        finally:
+            # Handlers only count page-crossing and branch penalties
+            self.cycles += cycles
+        return steps
+
+    def _handler(self, name, mode):
+        if mode == "rel":
+            fn = partial(self._branch, *_BRANCHES[name])
+        else:
+            fn = getattr(self, "_" + name.lower())
+        ea = getattr(self, "_ea_" + mode)
+        if mode in ("abx", "aby", "iny"):
+            ea = partial(ea, name in _PENALTY)
+        return lambda: fn(ea())
+
+    def _illegal(self):
+        pc = (self.pc - 1) & 0xFFFF
+        raise ValueError(f"Illegal opcode {self.mem[pc]:02X} at {pc:04X}")
+
+    #
+    # Addressing modes, returning the effective address
+    #
+
+    def _ea_imp(self):
+        return None
+
+    _ea_acc = _ea_imp
+
+    def _ea_imm(self):
+        pc = self.pc
+        self.pc = (pc + 1) & 0xFFFF
+        return pc
+
+    def _ea_zpg(self):
+        pc = self.pc
+        self.pc = (pc + 1) & 0xFFFF
+        return self.mem[pc]
+
+    def _ea_zpx(self):
+        pc = self.pc
+        self.pc = (pc + 1) & 0xFFFF
+        return (self.mem[pc] + self.x) & 0xFF
+
+    def _ea_zpy(self):
+        pc = self.pc
+        self.pc = (pc + 1) & 0xFFFF
+        return (self.mem[pc] + self.y) & 0xFF
+
+    def _ea_abs(self):
+        pc, mem = self.pc, self.mem
+        self.pc = (pc + 2) & 0xFFFF
+        return mem[pc] | mem[(pc + 1) & 0xFFFF] << 8
+
+    def _ea_abx(self, penalty):
+        base = self._ea_abs()
+        addr = (base + self.x) & 0xFFFF
+        if penalty and (base ^ addr) & 0xFF00:
+            self.cycles += 1
+        return addr
+
+    def _ea_aby(self, penalty):
+        base = self._ea_abs()
+        addr = (base + self.y) & 0xFFFF
+        if penalty and (base ^ addr) & 0xFF00:
+            self.cycles += 1
+        return addr
+
+    def _ea_ind(self):
+        ptr, mem = self._ea_abs(), self.mem
+        # NMOS bug: the pointer high byte never crosses a page
+        return mem[ptr] | mem[(ptr & 0xFF00) | ((ptr + 1) & 0xFF)] << 8
+
+    def _ea_inx(self):
+        zp = self._ea_zpx()
+        return self.mem[zp] | self.mem[(zp + 1) & 0xFF] << 8
+
+    def _ea_iny(self, penalty):
+        zp = self._ea_zpg()
+        base = self.mem[zp] | self.mem[(zp + 1) & 0xFF] << 8
+        addr = (base + self.y) & 0xFFFF
+        if penalty and (base ^ addr) & 0xFF00:
+            self.cycles += 1
+        return addr
+
+    def _ea_rel(self):
+        pc = self.pc
+        off = self.mem[pc]
+        pc = (pc + 1) & 0xFFFF
+        self.pc = pc
+        return (pc + off - (0x100 if off & 0x80 else 0)) & 0xFFFF
+
+    #
+    # Instructions
+    #
+
+    def _push(self, v):
+        self.mem[0x100 | self.sp] = v
+        self.sp = (self.sp - 1) & 0xFF
+
+    def _pull(self):
+        self.sp = (self.sp + 1) & 0xFF
+        return self.mem[0x100 | self.sp]
+
+    def _branch(self, mask, value, target):
+        if self.p & mask == value:
+            self.cycles += 2 if (self.pc ^ target) & 0xFF00 else 1
+            self.pc = target
+
+    def _lda(self, addr):
+        self.a = v = self.mem[addr]
+        self.p = self.p & 0x7D | _NZ[v]
+
+    def _ldx(self, addr):
+        self.x = v = self.mem[addr]
+        self.p = self.p & 0x7D | _NZ[v]
+
+    def _ldy(self, addr):
+        self.y = v = self.mem[addr]
+        self.p = self.p & 0x7D | _NZ[v]
+
+    def _sta(self, addr):
+        self.mem[addr] = self.a
+
+    def _stx(self, addr):
+        self.mem[addr] = self.x
+
+    def _sty(self, addr):
+        self.mem[addr] = self.y
+
+    def _adc(self, addr):
+        a, v, p = self.a, self.mem[addr], self.p
+        c = p & C
+        r = a + v + c
+        if p & D:
+            lo = (a & 0x0F) + (v & 0x0F) + c
+            if lo >= 0x0A:
+                lo = ((lo + 0x06) & 0x0F) + 0x10
+            t = (a & 0xF0) + (v & 0xF0) + lo
+            p = p & 0x3C | (t & N) | (0 if r & 0xFF else Z)
+            p |= V if (a ^ t) & (v ^ t) & 0x80 else 0
+            if t >= 0xA0:
+                t += 0x60
+            self.p = p | (C if t >= 0x100 else 0)
+            self.a = t & 0xFF
+            return
+        self.a = r & 0xFF
+        p = p & 0x3C | _NZ[r & 0xFF] | (r >> 8)
+        self.p = p | (V if (a ^ r) & (v ^ r) & 0x80 else 0)
+
+    def _sbc(self, addr):
+        a, v, p = self.a, self.mem[addr], self.p
+        c = p & C
+        r = a + (v ^ 0xFF) + c
+        p = p & 0x3C | _NZ[r & 0xFF] | (r >> 8)
+        p |= V if (a ^ r) & (a ^ v) & 0x80 else 0
+        if p & D:
+            lo = (a & 0x0F) - (v & 0x0F) + c - 1
+            if lo < 0:
+                lo = ((lo - 0x06) & 0x0F) - 0x10
+            t = (a & 0xF0) - (v & 0xF0) + lo
+            if t < 0:
+                t -= 0x60
+            r = t
+        self.a = r & 0xFF
+        self.p = p
+
+    def _and(self, addr):
+        self.a = v = self.a & self.mem[addr]
+        self.p = self.p & 0x7D | _NZ[v]
+
+    def _ora(self, addr):
+        self.a = v = self.a | self.mem[addr]
+        self.p = self.p & 0x7D | _NZ[v]
+
+    def _eor(self, addr):
+        self.a = v = self.a ^ self.mem[addr]
+        self.p = self.p & 0x7D | _NZ[v]
+
+    def _compare(self, reg, addr):
+        r = reg - self.mem[addr]
+        self.p = self.p & 0x7C | _NZ[r & 0xFF] | (0 if r < 0 else C)
+
+    def _cmp(self, addr):
+        self._compare(self.a, addr)
+
+    def _cpx(self, addr):
+        self._compare(self.x, addr)
+
+    def _cpy(self, addr):
+        self._compare(self.y, addr)
+
+    def _bit(self, addr):
+        v = self.mem[addr]
+        self.p = self.p & 0x3D | (v & 0xC0) | (0 if self.a & v else Z)
+
+    def _shift(self, addr, fn):
+        if addr is None:
+            v, c = fn(self.a)
+            self.a = v
+        else:
+            v, c = fn(self.mem[addr])
+            self.mem[addr] = v
+        self.p = self.p & 0x7C | _NZ[v] | c
+
+    def _asl(self, addr):
+        self._shift(addr, lambda v: ((v << 1) & 0xFF, v >> 7))
+
+    def _lsr(self, addr):
+        self._shift(addr, lambda v: (v >> 1, v & 1))
+
+    def _rol(self, addr):
+        c = self.p & C
+        self._shift(addr, lambda v: ((v << 1) & 0xFF | c, v >> 7))
+
+    def _ror(self, addr):
+        c = self.p & C
+        self._shift(addr, lambda v: (v >> 1 | c << 7, v & 1))
+
+    def _inc(self, addr):
+        self.mem[addr] = v = (self.mem[addr] + 1) & 0xFF
+        self.p = self.p & 0x7D | _NZ[v]
+
+    def _dec(self, addr):
+        self.mem[addr] = v = (self.mem[addr] - 1) & 0xFF
+        self.p = self.p & 0x7D | _NZ[v]
+
+    def _inx(self, addr):
+        self.x = v = (self.x + 1) & 0xFF
+        self.p = self.p & 0x7D | _NZ[v]
+
+    def _iny(self, addr):
+        self.y = v = (self.y + 1) & 0xFF
+        self.p = self.p & 0x7D | _NZ[v]
+
+    def _dex(self, addr):
+        self.x = v = (self.x - 1) & 0xFF
+        self.p = self.p & 0x7D | _NZ[v]
+
+    def _dey(self, addr):
+        self.y = v = (self.y - 1) & 0xFF
+        self.p = self.p & 0x7D | _NZ[v]
+
+    def _tax(self, addr):
+        self.x = v = self.a
+        self.p = self.p & 0x7D | _NZ[v]
+
+    def _tay(self, addr):
+        self.y = v = self.a
+        self.p = self.p & 0x7D | _NZ[v]
+
+    def _txa(self, addr):
+        self.a = v = self.x
+        self.p = self.p & 0x7D | _NZ[v]
+
+    def _tya(self, addr):
+        self.a = v = self.y
+        self.p = self.p & 0x7D | _NZ[v]
+
+    def _tsx(self, addr):
+        self.x = v = self.sp
+        self.p = self.p & 0x7D | _NZ[v]
+
+    def _txs(self, addr):
+        self.sp = self.x
+
+    def _pha(self, addr):
+        self._push(self.a)
+
+    def _php(self, addr):
+        self._push(self.p | B | U)
+
+    def _pla(self, addr):
+        self.a = v = self._pull()
+        self.p = self.p & 0x7D | _NZ[v]
+
+    def _plp(self, addr):
+        self.p = self._pull() & ~B | U
+
+    def _jmp(self, addr):
+        self.pc = addr
+
+    def _jsr(self, addr):
+        trap = self.traps.get(addr)
+        if trap is not None:
+            trap(self)
+            return
+        ret = (self.pc - 1) & 0xFFFF
+        self._push(ret >> 8)
+        self._push(ret & 0xFF)
+        self.pc = addr
+
+    def _rts(self, addr):
+        lo = self._pull()
+        self.pc = ((self._pull() << 8 | lo) + 1) & 0xFFFF
+
+    def _rti(self, addr):
+        self.p = self._pull() & ~B | U
+        lo = self._pull()
+        self.pc = self._pull() << 8 | lo
+
+    def _brk(self, addr):
+        ret = (self.pc + 1) & 0xFFFF
+        self._push(ret >> 8)
+        self._push(ret & 0xFF)
+        self._push(self.p | B | U)
+        self.p |= I
+        self.pc = self.mem[0xFFFE] | self.mem[0xFFFF] << 8
+
+    def _clc(self, addr):
+        self.p &= ~C
+
+    def _cld(self, addr):
+        self.p &= ~D
+
+    def _cli(self, addr):
+        self.p &= ~I
+
+    def _clv(self, addr):
+        self.p &= ~V
+
+    def _sec(self, addr):
+        self.p |= C
+
+    def _sed(self, addr):
+        self.p |= D
+
+    def _sei(self, addr):
+        self.p |= I
+
+    def _nop(self, addr):
+        pass
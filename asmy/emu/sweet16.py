@@ -0,0 +1,238 @@
+from array import array
+
+# Apple II ROM entry point of the SWEET16 interpreter
+SW16 = 0xF689
+
+
+class Sweet16:
+    """SWEET16 interpreter with a 16x16-bit register file.
+
+    R0 is the accumulator, R12 the subroutine stack pointer, R13 receives
+    compare results and R15 is the program counter. Memory is shared with
+    the host when attached to a 6502 CPU.
+    """
+
+    def __init__(self, mem=None):
+        self.mem = bytearray(0x10000) if mem is None else mem
+        self.r = array("H", bytes(32))
+        self.carry = 0
+        self.result = 0  # register holding the prior result for branches
+        self.brk = False
+        self.running = False
+        # fmt: off
+        self.ops = [
+            self._nonreg, self._set, self._ld, self._st,
+            self._ldi, self._sti, self._lddi, self._stdi,
+            self._popi, self._stpi, self._add, self._sub,
+            self._popdi, self._cpr, self._inr, self._dcr,
+        ]
+        self.branches = [
+            self._rtn, self._br, self._bnc, self._bc, self._bp, self._bm,
+            self._bz, self._bnz, self._bm1, self._bnm1, self._bk, self._rs,
+            self._bs, self._nop, self._nop, self._nop,
+        ]
+        # fmt: on
+
+    def load(self, code, addr=0):
+        """Copy code into memory at addr."""
+        self.mem[addr : addr + len(code)] = code
+
+    def step(self):
+        """Execute a single instruction."""
+        r = self.r
+        pc = r[15]
+        op = self.mem[pc]
+        r[15] = (pc + 1) & 0xFFFF
+        self.ops[op >> 4](op & 0xF)
+
+    def run(self, pc=None, max_steps=None):
+        """Run until RTN or BK, returning the number of executed instructions.
+
+        Afterwards R15 points past the RTN/BK opcode and brk tells which one
+        stopped the interpreter.
+        """
+        if pc is not None:
+            self.r[15] = pc
+        r, mem, ops = self.r, self.mem, self.ops
+        self.running, self.brk = True, False
+        steps = 0
+        while self.running and steps != max_steps:
+            pc = r[15]
+            op = mem[pc]
+            r[15] = (pc + 1) & 0xFFFF
+            ops[op >> 4](op & 0xF)
+            steps += 1
+        return steps
+
+    def attach(self, cpu, entry=SW16):
+        """Run as a coprocessor of an asmy.emu.mos6502 CPU.
+
+        A JSR to entry runs the SWEET16 code that follows it in line, with
+        the register file mirrored in zero page $00-$1F as on the Apple II,
+        and resumes the 6502 after the RTN.
+        """
+        self.mem = cpu.mem
+
+        def trap(cpu):
+            zp = cpu.mem
+            self.r = array("H", zp[0:32])
+            self.run(cpu.pc)
+            zp[0:32] = self.r.tobytes()
+            cpu.pc = self.r[15]
+
+        cpu.traps[entry] = trap
+
+    def _word(self, addr):
+        return self.mem[addr] | self.mem[(addr + 1) & 0xFFFF] << 8
+
+    #
+    # Register ops, dispatched on the high nibble
+    #
+
+    def _set(self, n):
+        r = self.r
+        r[n] = self._word(r[15])
+        r[15] = (r[15] + 2) & 0xFFFF
+        self.result, self.carry = n, 0
+
+    def _ld(self, n):
+        self.r[0] = self.r[n]
+        self.result, self.carry = 0, 0
+
+    def _st(self, n):
+        self.r[n] = self.r[0]
+        self.result, self.carry = n, 0
+
+    def _ldi(self, n):
+        r = self.r
+        r[0] = self.mem[r[n]]
+        r[n] = (r[n] + 1) & 0xFFFF
+        self.result, self.carry = 0, 0
+
+    def _sti(self, n):
+        r = self.r
+        self.mem[r[n]] = r[0] & 0xFF
+        r[n] = (r[n] + 1) & 0xFFFF
+        self.result, self.carry = 0, 0
+
+    def _lddi(self, n):
+        r = self.r
+        r[0] = self._word(r[n])
+        r[n] = (r[n] + 2) & 0xFFFF
+        self.result, self.carry = 0, 0
+
+    def _stdi(self, n):
+        r, mem = self.r, self.mem
+        mem[r[n]] = r[0] & 0xFF
+        mem[(r[n] + 1) & 0xFFFF] = r[0] >> 8
+        r[n] = (r[n] + 2) & 0xFFFF
+        self.result, self.carry = 0, 0
+
+    def _popi(self, n):
+        r = self.r
+        r[n] = (r[n] - 1) & 0xFFFF
+        r[0] = self.mem[r[n]]
+        self.result, self.carry = 0, 0
+
+    def _stpi(self, n):
+        r = self.r
+        r[n] = (r[n] - 1) & 0xFFFF
+        self.mem[r[n]] = r[0] & 0xFF
+        self.result, self.carry = 0, 0
+
+    def _add(self, n):
+        r = self.r
+        t = r[0] + r[n]
+        r[0] = t & 0xFFFF
+        self.result, self.carry = 0, t >> 16
+
+    def _sub(self, n):
+        r = self.r
+        t = r[0] - r[n]
+        r[0] = t & 0xFFFF
+        self.result, self.carry = 0, int(t >= 0)
+
+    def _popdi(self, n):
+        r, mem = self.r, self.mem
+        r[n] = (r[n] - 2) & 0xFFFF
+        r[0] = self._word(r[n])
+        self.result, self.carry = 0, 0
+
+    def _cpr(self, n):
+        r = self.r
+        t = r[0] - r[n]
+        r[13] = t & 0xFFFF
+        self.result, self.carry = 13, int(t >= 0)
+
+    def _inr(self, n):
+        self.r[n] = (self.r[n] + 1) & 0xFFFF
+        self.result, self.carry = n, 0
+
+    def _dcr(self, n):
+        self.r[n] = (self.r[n] - 1) & 0xFFFF
+        self.result, self.carry = n, 0
+
+    #
+    # Non-register ops, dispatched on the low nibble of 0x0N
+    #
+
+    def _nonreg(self, n):
+        self.branches[n]()
+
+    def _branch(self, taken):
+        r = self.r
+        pc = r[15]
+        off = self.mem[pc]
+        pc += 1
+        if taken:
+            pc += off - 0x100 if off & 0x80 else off
+        r[15] = pc & 0xFFFF
+
+    def _rtn(self):
+        self.running = False
+
+    def _bk(self):
+        self.running, self.brk = False, True
+
+    def _nop(self):
+        pass
+
+    def _br(self):
+        self._branch(True)
+
+    def _bnc(self):
+        self._branch(not self.carry)
+
+    def _bc(self):
+        self._branch(self.carry)
+
+    def _bp(self):
+        self._branch(not self.r[self.result] & 0x8000)
+
+    def _bm(self):
+        self._branch(self.r[self.result] & 0x8000)
+
+    def _bz(self):
+        self._branch(self.r[self.result] == 0)
+
+    def _bnz(self):
+        self._branch(self.r[self.result] != 0)
+
+    def _bm1(self):
+        self._branch(self.r[self.result] == 0xFFFF)
+
+    def _bnm1(self):
+        self._branch(self.r[self.result] != 0xFFFF)
+
+    def _bs(self):
+        r, mem = self.r, self.mem
+        ret = (r[15] + 1) & 0xFFFF
+        mem[r[12]] = ret & 0xFF
+        mem[(r[12] + 1) & 0xFFFF] = ret >> 8
+        r[12] = (r[12] + 2) & 0xFFFF
+        self._branch(True)
+
+    def _rs(self):
+        r = self.r
+        r[12] = (r[12] - 2) & 0xFFFF
+        r[15] = self._word(r[12])
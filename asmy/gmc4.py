@@ -1,6 +1,6 @@
-from .assembler import Assembler
+from .assembler import GMC4, Assembler, CurrentAssembler
 
-asm = Assembler(endian="big", pc_start=0)
+asm = CurrentAssembler(Assembler(endian="big", pc_start=0))
 label = lambda name: asm.label(name)
 
 
@@ -50,8 +50,8 @@ def mm():
     asm.db(7)  # m-
 
 
-def cal():
-    asm.db(0xE)
+def cal(x):
+    asm.dw(0x0E00 | (x & 15))
 
 
 def rsto():
@@ -141,14 +141,9 @@ def ciy(x):
 def jump(x):
     asm.db(0x0F)
     if isinstance(x, str):
-
-        def patch(rom, pos, addr):
-            print(f"addr {addr:x}")
-            rom[pos : pos + 2] = [addr >> 4, addr & 0xF]
-
-        asm.fixup(x, 2, patch)
+        asm.fixup(x, 2, GMC4)
     elif isinstance(x, int):
-        asm.dw(x)
+        asm.db(x >> 4 & 15, x & 15)
     else:
         raise ValueError(f"Invalid jump address: {x}")
 
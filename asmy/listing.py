@@ -0,0 +1,127 @@
+import os
+import sys
+from array import array
+
+_PACKAGE = os.path.dirname(os.path.abspath(__file__)) + os.sep
+
+
+class Listing:
+    """Records which source line emitted which bytes.
+
+    Enabled with Assembler(listing=True). Every call made from outside the
+    asmy package that emits bytes becomes one row: the section position, the
+    name of the called mnemonic and the calling file and line. Rows are kept
+    in parallel arrays with names and source locations interned.
+    """
+
+    def __init__(self, assembler):
+        self.assembler = assembler
+        self.section = array("H")
+        self.pos = array("q")
+        self.name = array("H")
+        self.place = array("L")
+        self.sections, self.names, self.places = [], [], []
+        self._sections, self._names, self._places = {}, {}, {}
+        self._internal = {}
+        self._frame = None
+
+    def clear(self):
+        for column in (self.section, self.pos, self.name, self.place):
+            del column[:]
+        self._frame = None
+
+    def __len__(self):
+        return len(self.pos)
+
+    @staticmethod
+    def _intern(table, index, key):
+        i = index.get(key)
+        if i is None:
+            i = index[key] = len(table)
+            table.append(key)
+        return i
+
+    def note(self):
+        """Start a row for the current mnemonic call, unless already started."""
+        internal = self._internal
+        f = sys._getframe(1)
+        outer, name = f, f.f_code.co_name
+        while f.f_back is not None:
+            code = f.f_code
+            inside = internal.get(code)
+            if inside is None:
+                inside = internal[code] = code.co_filename.startswith(_PACKAGE)
+            if not inside:
+                break
+            outer = f
+            if code.co_name != "<lambda>":
+                name = code.co_name
+            f = f.f_back
+        # The outermost asmy frame is new for every mnemonic call; holding on
+        # to it keeps its identity unique while nested emitters run
+        if outer is self._frame:
+            return
+        self._frame = outer
+        a = self.assembler
+        section = a._section
+        place = (f.f_code.co_filename, f.f_lineno)
+        self.section.append(self._intern(self.sections, self._sections, section))
+        self.pos.append(section.offset + len(a.rom))
+        self.name.append(self._intern(self.names, self._names, name))
+        self.place.append(self._intern(self.places, self._places, place))
+
+    def replay(self, name, place=None):
+        """Start a row named name for code emitted on behalf of a recorded
+        call, such as the instructions rewritten by asmy.peephole, or a line
+        of assembly source. place overrides the (file, line) of the row."""
+        self._frame = None
+        self.note()
+        self.name[-1] = self._intern(self.names, self._names, name)
+        if place is not None:
+            self.place[-1] = self._intern(self.places, self._places, place)
+
+    def relocate(self, fn):
+        """Map each row position through fn(section, pos), used by relax mode."""
+        for i, pos in enumerate(self.pos):
+            self.pos[i] = fn(self.sections[self.section[i]], pos)
+
+    def __iter__(self):
+        """Yield (address, bytes, mnemonic, file, line) for each row.
+
+        A row spans up to the next row in the same section. Bytes already
+        streamed out by the assembler are left out.
+        """
+        ends, following = array("q", self.pos), {}
+        for i in range(len(self.pos) - 1, -1, -1):
+            s = self.section[i]
+            ends[i] = following.get(s, self.sections[s].size)
+            following[s] = self.pos[i]
+        for i, pos in enumerate(self.pos):
+            section = self.sections[self.section[i]]
+            start, end = pos - section.offset, ends[i] - section.offset
+            data = bytes(section.rom[max(start, 0) : max(end, 0)])
+            filename, line = self.places[self.place[i]]
+            yield section.base + pos, data, self.names[self.name[i]], filename, line
+
+    def write(self, out):
+        """Write a listing of address, bytes, mnemonic and source location."""
+        rows = sorted(self, key=lambda row: row[0])
+        for addr, data, name, filename, line in rows:
+            raw = data[:8].hex(" ") + (" .." if len(data) > 8 else "")
+            location = f"{os.path.relpath(filename)}:{line}"
+            out.write(f"{addr:04X}  {raw:<26}  {name:<6} {location}\n")
+
+
+def symbols(labels, out, fmt="vice"):
+    """Write labels as a VICE label file or a MAME debugger script.
+
+    The VICE format is loaded with `ll` or -moncommands, the MAME one with
+    the debugger's `source` command and adds each label as a comment.
+    """
+    for name, addr in sorted(labels.items(), key=lambda item: item[1]):
+        if fmt == "vice":
+            out.write(f"al C:{addr:04X} .{name}\n")
+        elif fmt == "mame":
+            out.write(f"comadd {addr:04X},{name}\n")
+        else:
+            raise ValueError(f"Unknown symbol format: {fmt}")
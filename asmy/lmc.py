@@ -1,6 +1,6 @@
-from .assembler import Assembler
+from .assembler import LMC, Assembler, CurrentAssembler
 
-asm = Assembler(endian="big", pc_start=0)
+asm = CurrentAssembler(Assembler(endian="big", pc_start=0))
 label = lambda name: asm.label(name)
 org = lambda addr: asm.org(addr * 2)
 
@@ -9,14 +9,7 @@ def _mailbox(op, addr):
     if isinstance(addr, int):
         asm.dw(op * 100 + addr % 100)
     elif isinstance(addr, str):
-
-        def patch(rom, pos, addr_):
-            val = (
-                op * 100 + (addr_ % 100) // 2
-            )  # resolved address is in bytes, not in words
-            rom[pos : pos + 2] = val.to_bytes(2, "big")
-
-        asm.fixup(addr, 2, patch)
+        asm.fixup(addr, 2, LMC, op)
     else:
         raise ValueError(f"Invalid address type: {addr}")
 
@@ -73,7 +66,10 @@ def bra(x):
 
 def dat(x=0):
     """Reseve mailbox for data storage."""
-    _mailbox(0, x)
+    if isinstance(x, int):
+        asm.dw(x % 1000)
+    else:
+        _mailbox(0, x)
 
 
 def mem():
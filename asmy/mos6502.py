@@ -1,6 +1,6 @@
-from .assembler import Assembler
+from .assembler import ABS_LE, REL8, Assembler, CurrentAssembler, Expr, hi, lo
 
-asm = Assembler(endian="little", pc_start=0)
+asm = CurrentAssembler(Assembler(endian="little", pc_start=0))
 label = lambda name: asm.label(name)
 
 
@@ -9,59 +9,151 @@ class Immediate:
         self.value = value
 
     def __matmul__(self, value):
-        self.value = value
-        return self
+        return Immediate(value)
 
 
 A, X, Y, I = "A", "X", "Y", Immediate()
 
 
-def _emit_address(operand, size):
-    def patch(rom, pos, addr):
-        rom[pos : pos + size] = addr.to_bytes(size, "little")
-
-    if isinstance(operand, int):
-        asm.db(operand) if size == 1 else asm.dw(operand)
-    else:
-        asm.fixup(operand, size, patch)
-
-
-def _emit(opcodes, arg, index):
+# Opcode for each (mnemonic, addressing mode) pair
+# fmt: off
+OPCODES = {
+    "ADC": {"imm": 0x69, "zpg": 0x65, "zpx": 0x75, "abs": 0x6D, "abx": 0x7D, "aby": 0x79, "inx": 0x61, "iny": 0x71},
+    "AND": {"imm": 0x29, "zpg": 0x25, "zpx": 0x35, "abs": 0x2D, "abx": 0x3D, "aby": 0x39, "inx": 0x21, "iny": 0x31},
+    "ASL": {"acc": 0x0A, "zpg": 0x06, "zpx": 0x16, "abs": 0x0E, "abx": 0x1E},
+    "BCC": {"rel": 0x90},
+    "BCS": {"rel": 0xB0},
+    "BEQ": {"rel": 0xF0},
+    "BIT": {"zpg": 0x24, "abs": 0x2C},
+    "BMI": {"rel": 0x30},
+    "BNE": {"rel": 0xD0},
+    "BPL": {"rel": 0x10},
+    "BRK": {"imp": 0x00},
+    "BVC": {"rel": 0x50},
+    "BVS": {"rel": 0x70},
+    "CLC": {"imp": 0x18},
+    "CLD": {"imp": 0xD8},
+    "CLI": {"imp": 0x58},
+    "CLV": {"imp": 0xB8},
+    "CMP": {"imm": 0xC9, "zpg": 0xC5, "zpx": 0xD5, "abs": 0xCD, "abx": 0xDD, "aby": 0xD9, "inx": 0xC1, "iny": 0xD1},
+    "CPX": {"imm": 0xE0, "zpg": 0xE4, "abs": 0xEC},
+    "CPY": {"imm": 0xC0, "zpg": 0xC4, "abs": 0xCC},
+    "DEC": {"zpg": 0xC6, "zpx": 0xD6, "abs": 0xCE, "abx": 0xDE},
+    "DEX": {"imp": 0xCA},
+    "DEY": {"imp": 0x88},
+    "EOR": {"imm": 0x49, "zpg": 0x45, "zpx": 0x55, "abs": 0x4D, "abx": 0x5D, "aby": 0x59, "inx": 0x41, "iny": 0x51},
+    "INC": {"zpg": 0xE6, "zpx": 0xF6, "abs": 0xEE, "abx": 0xFE},
+    "INX": {"imp": 0xE8},
+    "INY": {"imp": 0xC8},
+    "JMP": {"abs": 0x4C, "ind": 0x6C},
+    "JSR": {"abs": 0x20},
+    "LDA": {"imm": 0xA9, "zpg": 0xA5, "zpx": 0xB5, "abs": 0xAD, "abx": 0xBD, "aby": 0xB9, "inx": 0xA1, "iny": 0xB1},
+    "LDX": {"imm": 0xA2, "zpg": 0xA6, "zpy": 0xB6, "abs": 0xAE, "aby": 0xBE},
+    "LDY": {"imm": 0xA0, "zpg": 0xA4, "zpx": 0xB4, "abs": 0xAC, "abx": 0xBC},
+    "LSR": {"acc": 0x4A, "zpg": 0x46, "zpx": 0x56, "abs": 0x4E, "abx": 0x5E},
+    "NOP": {"imp": 0xEA},
+    "ORA": {"imm": 0x09, "zpg": 0x05, "zpx": 0x15, "abs": 0x0D, "abx": 0x1D, "aby": 0x19, "inx": 0x01, "iny": 0x11},
+    "PHA": {"imp": 0x48},
+    "PHP": {"imp": 0x08},
+    "PLA": {"imp": 0x68},
+    "PLP": {"imp": 0x28},
+    "ROL": {"acc": 0x2A, "zpg": 0x26, "zpx": 0x36, "abs": 0x2E, "abx": 0x3E},
+    "ROR": {"acc": 0x6A, "zpg": 0x66, "zpx": 0x76, "abs": 0x6E, "abx": 0x7E},
+    "RTI": {"imp": 0x40},
+    "RTS": {"imp": 0x60},
+    "SBC": {"imm": 0xE9, "zpg": 0xE5, "zpx": 0xF5, "abs": 0xED, "abx": 0xFD, "aby": 0xF9, "inx": 0xE1, "iny": 0xF1},
+    "SEC": {"imp": 0x38},
+    "SED": {"imp": 0xF8},
+    "SEI": {"imp": 0x78},
+    "STA": {"zpg": 0x85, "zpx": 0x95, "abs": 0x8D, "abx": 0x9D, "aby": 0x99, "inx": 0x81, "iny": 0x91},
+    "STX": {"zpg": 0x86, "zpy": 0x96, "abs": 0x8E},
+    "STY": {"zpg": 0x84, "zpx": 0x94, "abs": 0x8C},
+    "TAX": {"imp": 0xAA},
+    "TAY": {"imp": 0xA8},
+    "TSX": {"imp": 0xBA},
+    "TXA": {"imp": 0x8A},
+    "TXS": {"imp": 0x9A},
+    "TYA": {"imp": 0x98},
+}
+
+# Instruction length for each addressing mode
+SIZES = {
+    "imp": 1, "acc": 1, "imm": 2, "rel": 2, "zpg": 2, "zpx": 2, "zpy": 2,
+    "inx": 2, "iny": 2, "abs": 3, "abx": 3, "aby": 3, "ind": 3,
+}
+# fmt: on
+
+
+def _encode_branch(opcode):
+    # Short form is the branch itself, long form branches over a JMP using
+    # the inverted condition (bit 5 of a branch opcode selects the polarity)
+    def encode(pc, addr, size):
+        if size == 2:
+            offset = addr - (pc + 2)
+            return bytes((opcode, offset & 0xFF)) if -128 <= offset <= 127 else None
+        return bytes((opcode ^ 0x20, 3, 0x4C, addr & 0xFF, addr >> 8 & 0xFF))
+
+    return encode
+
+
+def _encode_zpg(zp_opcode, opcode):
+    def encode(pc, addr, size):
+        if size == 2:
+            return bytes((zp_opcode, addr)) if addr < 0x100 else None
+        return bytes((opcode, addr & 0xFF, addr >> 8 & 0xFF))
+
+    return encode
+
+
+# Label references that relax mode lays out in finalize(), by opcode: branches
+# grow into a JMP when out of range, absolute modes start out as zero page
+# and grow if the label lands above $FF
+_RELAX = {}
+for _ops in OPCODES.values():
+    if "rel" in _ops:
+        _RELAX[_ops["rel"]] = ((2, 5), _encode_branch(_ops["rel"]))
+    for _abs, _zpg in (("abs", "zpg"), ("abx", "zpx"), ("aby", "zpy")):
+        if _abs in _ops and _zpg in _ops:
+            _RELAX[_ops[_abs]] = ((2, 3), _encode_zpg(_ops[_zpg], _ops[_abs]))
+del _ops, _abs, _zpg
+
+
+def _emit(opcodes, arg=None, index=None):
     mode, operand = _resolve_mode(opcodes, arg, index)
     try:
         opcode = opcodes[mode]
     except KeyError:
         raise ValueError(f"Invalid addressing mode {mode} for instruction")
-    asm.db(opcode)
-    if mode == "acc":
+    a = asm.get()
+    if a.trace is not None:
+        a.trace.append((opcode, mode, operand, (opcodes, arg, index)))
         return
-    elif mode == "rel":
-        if isinstance(operand, int):
-            asm.db(operand)
-        elif isinstance(operand, str):
-
-            def patch_relative(rom, pos, addr):
-                rom[pos] = (addr - (pos + 1)) & 0xFF
-
-            asm.fixup(operand, 1, patch_relative)
-    elif mode in ("ind", "inx", "iny"):
-        if mode == "ind":
-            _emit_address(operand, 2)
-        elif mode == "inx":
-            _emit_address(operand, 1)
-        elif mode == "iny":
-            _emit_address(operand, 1)
-    elif mode in ("zpg", "zpx", "zpy"):
-        _emit_address(operand, 1)
-    elif mode in ("abs", "abx", "aby"):
-        _emit_address(operand, 2)
-    elif mode == "imm":
-        asm.db(operand)
+    if a.listing is not None:
+        a.listing.note()
+    size = SIZES[mode]
+    if size == 1:
+        a.rom.append(opcode)
+        a.pc += 1
+    elif isinstance(operand, int):
+        mask = 0xFF if size == 2 else 0xFFFF
+        a.rom += (opcode | (operand & mask) << 8).to_bytes(size, "little")
+        a.pc += size
+    elif a.relax and opcode in _RELAX and isinstance(operand, str):
+        a.span(operand, *_RELAX[opcode])
     else:
-        raise ValueError(f"Unhandled addressing mode {mode}")
+        a.rom.append(opcode)
+        a.pc += 1
+        if mode == "imm":
+            a.fixup(operand, 1, ABS_LE)
+        elif mode == "rel":
+            a.fixup(operand, 1, REL8, a.pc + 1)
+        else:
+            a.fixup(operand, size - 1, ABS_LE)
 
 
 def _resolve_mode(opcodes, arg, index):
+    if arg is None:
+        return "imp", None
     if isinstance(arg, Immediate):
         return "imm", arg.value
     if arg == A:
@@ -73,7 +165,7 @@ def _resolve_mode(opcodes, arg, index):
     if isinstance(arg, list):
         if len(arg) < 1:
             raise ValueError("Invalid indirect argument: empty list")
-        if not isinstance(arg[0], (int, str)):
+        if not isinstance(arg[0], (int, str, Expr)):
             raise ValueError(f"Invalid indirect argument: {arg}")
         if len(arg) == 1:  # ([a]) or ([a], Y)
             if index is not None and index != Y:
@@ -83,7 +175,7 @@ def _resolve_mode(opcodes, arg, index):
             return "inx", arg[0]
         raise ValueError(f"Invalid indirect argument: {arg}")
     if "rel" in opcodes:
-        if not isinstance(arg, (int, str)):
+        if not isinstance(arg, (int, str, Expr)):
             raise ValueError(f"Invalid relative argument: {arg}")
         return "rel", arg
     zp = isinstance(arg, int) and 0 <= arg < 0x100
@@ -94,442 +186,282 @@ def _resolve_mode(opcodes, arg, index):
     return "zpg" if zp and "zpg" in opcodes else "abs", arg
 
 
-def _handle_relative(label):
-    asm = Assembler.get_current()
-    pos = len(asm.rom)
-    asm.db(0)  # Placeholder for offset
-
-    def patch(rom, _, addr):
-        offset = (addr - (pos + 2)) & 0xFF  # +2 for opcode + offset
-        rom[pos] = offset
-
-    asm.fixups.append((pos, label, patch))
-
-
-# def _emit(op, arg, index):
-#     zeropage = lambda: "zpg" in op or "zpx" in op or "zpy" in op
-#
-#     def patch_abs(rom, pos, addr):
-#         rom[pos : pos + 2] = addr.to_bytes(2, "little")
-#
-#     def patch_rel(rom, pos, addr):
-#         rom[pos] = addr & 0xFF
-#
-#     assert index is None or index == X or index == Y
-#     if arg == A:
-#         assert index is None
-#         asm.db(op["acc"])
-#     elif isinstance(arg, Immediate):
-#         assert index is None
-#         asm.db(op["imm"], arg.value)
-#     elif "rel" in op:  # relative
-#         assert index is None
-#         pass
-#     elif isinstance(arg, list):  # indirect: f([a]), f([a,X]) or f([a],Y)
-#         if index is None:
-#             if len(arg) == 1:
-#                 b = op["ind"]
-#             else:
-#                 assert len(arg) == 2 and arg[1] == X
-#                 b = op["inx"]
-#         elif index == Y:
-#             assert len(arg) == 1
-#             b = op["iny"]
-#         n = arg[0]
-#         if isinstance(n, int):
-#             asm.db(b, n & 0xFF)
-#         elif isinstance(n, str):
-#             # TODO
-#             pass
-#         else:
-#             raise ValueError(f"invalid indirection argument: {arg},{index}")
-#     elif isinstance(arg, int) and zeropage() and arg >= 0 and arg < 0x100:  # zero page
-#         b = op["zpg"] if index is None else op["zpx"] if index == X else op["zpy"]
-#         asm.db(b, arg)
-#     elif isinstance(arg, int) and arg > 0xFF and arg < 0x10000:  # absolute
-#         b = op["abs"] if index is None else op["abx"] if index == X else op["aby"]
-#         asm.db(b, arg & 0xFF, (arg >> 8) & 0xFF)
-#
-
 
 def ADC(arg, index=None):
     """Add with Carry"""
-    _emit(
-        {
-            "imm": 0x69,
-            "zpg": 0x65,
-            "zpx": 0x75,
-            "abs": 0x6D,
-            "abx": 0x7D,
-            "aby": 0x79,
-            "inx": 0x61,
-            "iny": 0x71,
-        },
-        arg,
-        index,
-    )
+    _emit(OPCODES["ADC"], arg, index)
 
 
 def AND(arg, index=None):
     """Logical AND"""
-    _emit(
-        {
-            "imm": 0x29,
-            "zpg": 0x25,
-            "zpx": 0x35,
-            "abs": 0x2D,
-            "abx": 0x3D,
-            "aby": 0x39,
-            "inx": 0x21,
-            "iny": 0x31,
-        },
-        arg,
-        index,
-    )
+    _emit(OPCODES["AND"], arg, index)
 
 
 def ASL(arg, index=None):
     """Arithmetic Shift Left"""
-    _emit({"acc": 0x0A, "zpg": 0x06, "zpx": 0x16, "abs": 0x0E, "abx": 0x1E}, arg, index)
+    _emit(OPCODES["ASL"], arg, index)
 
 
 def BCC(arg):
     """Branch if Carry Clear"""
-    _emit({"rel": 0x90}, arg, None)
+    _emit(OPCODES["BCC"], arg)
 
 
 def BCS(arg):
     """Branch if Carry Set"""
-    _emit({"rel": 0xB0}, arg, None)
+    _emit(OPCODES["BCS"], arg)
 
 
 def BEQ(arg):
     """Branch if Equal"""
-    _emit({"rel": 0xF0}, arg, None)
+    _emit(OPCODES["BEQ"], arg)
 
 
 def BIT(arg):
     """Bit Test"""
-    _emit({"zpg": 0x24, "abs": 0x2C}, arg, None)
+    _emit(OPCODES["BIT"], arg)
 
 
 def BMI(arg):
     """Branch if Minus"""
-    _emit({"rel": 0x30}, arg, None)
+    _emit(OPCODES["BMI"], arg)
 
 
 def BNE(arg):
     """Branch if Not Equal"""
-    _emit({"rel": 0xD0}, arg, None)
+    _emit(OPCODES["BNE"], arg)
 
 
 def BPL(arg):
     """Branch if Positive"""
-    _emit({"rel": 0x10}, arg, None)
+    _emit(OPCODES["BPL"], arg)
 
 
 def BRK():
     """Force Interrupt"""
-    asm.db(0x00)
+    _emit(OPCODES["BRK"])
 
 
 def BVC(arg):
     """Branch if Overflow Clear"""
-    _emit({"rel": 0x50}, arg, None)
+    _emit(OPCODES["BVC"], arg)
 
 
 def BVS(arg):
     """Branch if Overflow Set"""
-    _emit({"rel": 0x70}, arg, None)
+    _emit(OPCODES["BVS"], arg)
 
 
 def CLC():
     """Clear Carry Flag"""
-    asm.db(0x18)
+    _emit(OPCODES["CLC"])
 
 
 def CLD():
     """Clear Decimal Mode"""
-    asm.db(0xD8)
+    _emit(OPCODES["CLD"])
 
 
 def CLI():
     """Clear Interrupt Disable"""
-    asm.db(0x58)
+    _emit(OPCODES["CLI"])
 
 
 def CLV():
     """Clear Overflow Flag"""
-    asm.db(0xB8)
+    _emit(OPCODES["CLV"])
 
 
 def CMP(arg, index=None):
     """Compare"""
-    _emit(
-        {
-            "imm": 0xC9,
-            "zpg": 0xC5,
-            "zpx": 0xD5,
-            "abs": 0xCD,
-            "abx": 0xDD,
-            "aby": 0xD9,
-            "inx": 0xC1,
-            "iny": 0xD1,
-        },
-        arg,
-        index,
-    )
+    _emit(OPCODES["CMP"], arg, index)
 
 
 def CPX(arg):
     """Compare X Register"""
-    _emit({"imm": 0xE0, "zpg": 0xE4, "abs": 0xEC}, arg, None)
+    _emit(OPCODES["CPX"], arg)
 
 
 def CPY(arg):
     """Compare Y Register"""
-    _emit({"imm": 0xC0, "zpg": 0xC4, "abs": 0xCC}, arg, None)
+    _emit(OPCODES["CPY"], arg)
 
 
 def DEC(arg, index=None):
     """Decrement Memory"""
-    _emit({"zpg": 0xC6, "zpx": 0xD6, "abs": 0xCE, "abx": 0xDE}, arg, index)
+    _emit(OPCODES["DEC"], arg, index)
 
 
 def DEX():
     """Decrement X Register"""
-    asm.db(0xCA)
+    _emit(OPCODES["DEX"])
 
 
 def DEY():
     """Decrement Y Register"""
-    asm.db(0x88)
+    _emit(OPCODES["DEY"])
 
 
 def EOR(arg, index=None):
     """Exclusive OR"""
-    _emit(
-        {
-            "imm": 0x49,
-            "zpg": 0x45,
-            "zpx": 0x55,
-            "abs": 0x4D,
-            "abx": 0x5D,
-            "aby": 0x59,
-            "inx": 0x41,
-            "iny": 0x51,
-        },
-        arg,
-        index,
-    )
+    _emit(OPCODES["EOR"], arg, index)
 
 
 def INC(arg, index=None):
     """Increment Memory"""
-    _emit({"zpg": 0xE6, "zpx": 0xF6, "abs": 0xEE, "abx": 0xFE}, arg, index)
+    _emit(OPCODES["INC"], arg, index)
 
 
 def INX():
     """Increment X Register"""
-    asm.db(0xE8)
+    _emit(OPCODES["INX"])
 
 
 def INY():
     """Increment Y Register"""
-    asm.db(0xC8)
+    _emit(OPCODES["INY"])
 
 
 def JMP(arg):
     """Jump"""
-    _emit({"abs": 0x4C, "ind": 0x6C}, arg, None)
+    _emit(OPCODES["JMP"], arg)
 
 
 def JSR(arg):
     """Jump to Subroutine"""
-    _emit({"abs": 0x20}, arg, None)
+    _emit(OPCODES["JSR"], arg)
 
 
 def LDA(arg, index=None):
     """Load Accumulator"""
-    _emit(
-        {
-            "imm": 0xA9,
-            "zpg": 0xA5,
-            "zpx": 0xB5,
-            "abs": 0xAD,
-            "abx": 0xBD,
-            "aby": 0xB9,
-            "inx": 0xA1,
-            "iny": 0xB1,
-        },
-        arg,
-        index,
-    )
+    _emit(OPCODES["LDA"], arg, index)
 
 
 def LDX(arg, index=None):
     """Load X Register"""
-    _emit({"imm": 0xA2, "zpg": 0xA6, "zpy": 0xB6, "abs": 0xAE, "aby": 0xBE}, arg, index)
+    _emit(OPCODES["LDX"], arg, index)
 
 
 def LDY(arg, index=None):
     """Load Y Register"""
-    _emit({"imm": 0xA0, "zpg": 0xA4, "zpx": 0xB4, "abs": 0xAC, "abx": 0xBC}, arg, index)
+    _emit(OPCODES["LDY"], arg, index)
 
 
 def LSR(arg, index=None):
     """Logical Shift Right"""
-    _emit({"acc": 0x4A, "zpg": 0x46, "zpx": 0x56, "abs": 0x4E, "abx": 0x5E}, arg, index)
+    _emit(OPCODES["LSR"], arg, index)
 
 
 def NOP():
     """No Operation"""
-    asm.db(0xEA)
+    _emit(OPCODES["NOP"])
 
 
 def ORA(arg, index=None):
     """Logical Inclusive OR"""
-    _emit(
-        {
-            "imm": 0x09,
-            "zpg": 0x05,
-            "zpx": 0x15,
-            "abs": 0x0D,
-            "abx": 0x1D,
-            "aby": 0x19,
-            "inx": 0x01,
-            "iny": 0x11,
-        },
-        arg,
-        index,
-    )
+    _emit(OPCODES["ORA"], arg, index)
 
 
 def PHA():
     """Push Accumulator"""
-    asm.db(0x48)
+    _emit(OPCODES["PHA"])
 
 
 def PHP():
     """Push Processor Status"""
-    asm.db(0x08)
+    _emit(OPCODES["PHP"])
 
 
 def PLA():
     """Pull Accumulator"""
-    asm.db(0x68)
+    _emit(OPCODES["PLA"])
 
 
 def PLP():
     """Pull Processor Status"""
-    asm.db(0x28)
+    _emit(OPCODES["PLP"])
 
 
 def ROL(arg, index=None):
     """Rotate Left"""
-    _emit({"acc": 0x2A, "zpg": 0x26, "zpx": 0x36, "abs": 0x2E, "abx": 0x3E}, arg, index)
+    _emit(OPCODES["ROL"], arg, index)
 
 
 def ROR(arg, index=None):
     """Rotate Right"""
-    _emit({"acc": 0x6A, "zpg": 0x66, "zpx": 0x76, "abs": 0x6E, "abx": 0x7E}, arg, index)
+    _emit(OPCODES["ROR"], arg, index)
 
 
 def RTI():
     """Return from Interrupt"""
-    asm.db(0x40)
+    _emit(OPCODES["RTI"])
 
 
 def RTS():
     """Return from Subroutine"""
-    asm.db(0x60)
+    _emit(OPCODES["RTS"])
 
 
 def SBC(arg, index=None):
     """Subtract with Carry"""
-    _emit(
-        {
-            "imm": 0xE9,
-            "zpg": 0xE5,
-            "zpx": 0xF5,
-            "abs": 0xED,
-            "abx": 0xFD,
-            "aby": 0xF9,
-            "inx": 0xE1,
-            "iny": 0xF1,
-        },
-        arg,
-        index,
-    )
+    _emit(OPCODES["SBC"], arg, index)
 
 
 def SEC():
     """Set Carry Flag"""
-    asm.db(0x38)
+    _emit(OPCODES["SEC"])
 
 
 def SED():
     """Set Decimal Flag"""
-    asm.db(0xF8)
+    _emit(OPCODES["SED"])
 
 
 def SEI():
     """Set Interrupt Disable"""
-    asm.db(0x78)
+    _emit(OPCODES["SEI"])
 
 
 def STA(arg, index=None):
     """Store Accumulator"""
-    _emit(
-        {
-            "zpg": 0x85,
-            "zpx": 0x95,
-            "abs": 0x8D,
-            "abx": 0x9D,
-            "aby": 0x99,
-            "inx": 0x81,
-            "iny": 0x91,
-        },
-        arg,
-        index,
-    )
+    _emit(OPCODES["STA"], arg, index)
 
 
 def STX(arg, index=None):
     """Store X Register"""
-    _emit({"zpg": 0x86, "zpy": 0x96, "abs": 0x8E}, arg, index)
+    _emit(OPCODES["STX"], arg, index)
 
 
 def STY(arg, index=None):
     """Store Y Register"""
-    _emit({"zpg": 0x84, "zpx": 0x94, "abs": 0x8C}, arg, index)
+    _emit(OPCODES["STY"], arg, index)
 
 
 def TAX():
     """Transfer Accumulator to X"""
-    asm.db(0xAA)
+    _emit(OPCODES["TAX"])
 
 
 def TAY():
     """Transfer Accumulator to Y"""
-    asm.db(0xA8)
+    _emit(OPCODES["TAY"])
 
 
 def TSX():
     """Transfer Stack Pointer to X"""
-    asm.db(0xBA)
+    _emit(OPCODES["TSX"])
 
 
 def TXA():
     """Transfer X to Accumulator"""
-    asm.db(0x8A)
+    _emit(OPCODES["TXA"])
 
 
 def TXS():
     """Transfer X to Stack Pointer"""
-    asm.db(0x9A)
+    _emit(OPCODES["TXS"])
 
 
 def TYA():
     """Transfer Y to Accumulator"""
-    asm.db(0x98)
+    _emit(OPCODES["TYA"])
@@ -0,0 +1,109 @@
+# Writers take a flat image (any bytes-like object, such as the result of
+# finalize()) placed at base, or the [(address, data), ...] list returned by
+# finalize(chunks=True). Data is sliced through memoryviews and written to a
+# file-like object in one pass.
+
+# Bytes written to out at a time by the binary formats
+CHUNK_SIZE = 1 << 16
+
+_ZERO = bytes(256)
+
+
+def _regions(data, base):
+    if isinstance(data, list):
+        return [(addr, memoryview(d).cast("B")) for addr, d in data]
+    return [(base, memoryview(data).cast("B"))]
+
+
+def _records(regions, size, skip_zero):
+    zero = _ZERO[:size]
+    for base, mv in regions:
+        for i in range(0, len(mv), size):
+            chunk = mv[i : i + size]
+            if skip_zero and chunk == zero[: len(chunk)]:
+                continue
+            yield base + i, chunk
+
+
+def _copy(out, mv):
+    for i in range(0, len(mv), CHUNK_SIZE):
+        out.write(mv[i : i + CHUNK_SIZE])
+
+
+def ihex(data, out, base=0, record_size=16, skip_zero=False):
+    """Write Intel HEX, with extended linear address records above 64K.
+
+    With skip_zero, records holding only zeros are left out. That shrinks
+    images with large org() gaps, but also drops zeroed data, so use it only
+    when the loader clears memory to zero.
+    """
+    upper = 0
+    for addr, chunk in _records(_regions(data, base), record_size, skip_zero):
+        if addr >> 16 != upper:
+            upper = addr >> 16
+            out.write(_ihex_record(4, 0, upper.to_bytes(2, "big")))
+        out.write(_ihex_record(0, addr & 0xFFFF, chunk))
+    out.write(":00000001FF\n")
+
+
+def _ihex_record(kind, addr, data):
+    raw = bytes((len(data), addr >> 8, addr & 0xFF, kind)) + data
+    return f":{raw.hex().upper()}{-sum(raw) & 0xFF:02X}\n"
+
+
+def srec(data, out, base=0, record_size=32, skip_zero=False, start=None):
+    """Write Motorola S-records.
+
+    The address width (S1/S2/S3) is picked from the highest address. start
+    is the entry point in the termination record, the first address by
+    default. skip_zero works as in ihex().
+    """
+    regions = _regions(data, base)
+    end = max((addr + len(mv) for addr, mv in regions), default=0)
+    width = 2 if end <= 0x10000 else 3 if end <= 0x1000000 else 4
+    kind = width - 1
+    out.write(_srec_record(0, 2, 0, b""))
+    count = 0
+    for addr, chunk in _records(regions, record_size, skip_zero):
+        out.write(_srec_record(kind, width, addr, chunk))
+        count += 1
+    if count <= 0xFFFF:
+        out.write(_srec_record(5, 2, count, b""))
+    if start is None:
+        start = regions[0][0] if regions else 0
+    out.write(_srec_record(10 - kind, width, start, b""))
+
+
+def _srec_record(kind, width, addr, data):
+    raw = bytes((width + len(data) + 1,)) + addr.to_bytes(width, "big") + data
+    return f"S{kind}{raw.hex().upper()}{~sum(raw) & 0xFF:02X}\n"
+
+
+def ines(prg, out, chr_rom=b"", mapper=0, vertical=False, battery=False):
+    """Write an iNES (.nes) file for the NES.
+
+    prg is the 6502 image, padded to a multiple of 16K, chr_rom the optional
+    pattern table ROM, padded to a multiple of 8K.
+    """
+    prg, chr_rom = memoryview(prg).cast("B"), memoryview(chr_rom).cast("B")
+    prg_banks, chr_banks = -(-len(prg) // 0x4000), -(-len(chr_rom) // 0x2000)
+    if not 0 < prg_banks < 256 or chr_banks > 255:
+        raise ValueError(f"Invalid iNES sizes: {len(prg)} PRG, {len(chr_rom)} CHR")
+    flags6 = (mapper & 0x0F) << 4 | battery << 1 | vertical
+    header = b"NES\x1a" + bytes((prg_banks, chr_banks, flags6, mapper & 0xF0))
+    out.write(header + bytes(8))
+    _copy(out, prg)
+    out.write(bytes(prg_banks * 0x4000 - len(prg)))
+    _copy(out, chr_rom)
+    out.write(bytes(chr_banks * 0x2000 - len(chr_rom)))
+
+
+def ch8(data, out, base=0x200):
+    """Write a raw CHIP-8 program as loaded at 0x200, gaps zero-filled."""
+    pos = 0x200
+    for addr, mv in sorted(_regions(data, base), key=lambda r: r[0]):
+        if addr < pos:
+            raise ValueError(f"Data at {addr:04X} overlaps the CHIP-8 program")
+        out.write(bytes(addr - pos))
+        _copy(out, mv)
+        pos = addr + len(mv)
@@ -0,0 +1,247 @@
+import importlib
+import re
+
+from .assembler import Expr, hi, lo
+from .batch import _module
+
+# label: mnemonic operands ; comment
+_LINE = re.compile(
+    r"""\s*(?:(?P<label>[A-Za-z_.][\w.]*):)?
+    \s*(?:(?P<op>\.?[A-Za-z_]\w*[+-]?)
+    (?P<args>(?:"[^"]*"|'[^']*'|[^;"'])*))?
+    \s*(?:;.*)?$""",
+    re.X,
+)
+_TERM = re.compile(
+    r"""\s*(?P<sign>[-+])?\s*(?:
+    \$(?P<hex>[0-9A-Fa-f]+)|0[xX](?P<hex2>[0-9A-Fa-f]+)|%(?P<bin>[01]+)|
+    (?P<dec>\d+)|'(?P<char>.)'|(?P<name>[A-Za-z_.][\w.]*))\s*""",
+    re.X,
+)
+_ARGS = re.compile(r"""\s*("[^"]*"|'[^']*'|[^,]+)\s*(?:,|$)""")
+_INDIRECT_X = re.compile(r"\((.+),\s*[Xx]\s*\)$")
+_INDIRECT_Y = re.compile(r"\((.+)\)\s*,\s*[Yy]$")
+_INDIRECT = re.compile(r"\((.+)\)$")
+_INDEXED = re.compile(r"(.+),\s*([XxYy])$")
+
+# Mnemonics that are not valid Python names
+_ALIASES = {"asmy.gmc4": {"M+": "MP", "M-": "MM"}}
+
+
+def value(text):
+    """Parse a number, label or expression like `<table`, `end-start+1`.
+
+    Returns an int when the value is constant, else a label name or Expr.
+    """
+    text = text.strip()
+    if text[:1] == "<":
+        return lo(value(text[1:]))
+    if text[:1] == ">":
+        return hi(value(text[1:]))
+    result, pos = None, 0
+    while pos < len(text):
+        m = _TERM.match(text, pos)
+        if m is None or m.end() == pos:
+            raise ValueError(f"Invalid value: {text}")
+        pos = m.end()
+        g = m.group
+        if g("hex") or g("hex2"):
+            term = int(g("hex") or g("hex2"), 16)
+        elif g("bin"):
+            term = int(g("bin"), 2)
+        elif g("dec"):
+            term = int(g("dec"))
+        elif g("char"):
+            term = ord(g("char"))
+        else:
+            term = g("name")
+        if result is None and g("sign") == "-":
+            result = -term if isinstance(term, int) else Expr("-", 0, term)
+        elif result is None:
+            result = term
+        elif g("sign") is None:
+            raise ValueError(f"Invalid value: {text}")
+        elif isinstance(result, int) and isinstance(term, int):
+            result = result + term if g("sign") == "+" else result - term
+        else:
+            result = Expr(g("sign"), result, term)
+    if result is None:
+        raise ValueError("Missing value")
+    return result
+
+
+def _split(args):
+    return [m.group(1).strip() for m in _ARGS.finditer(args) if m.group(1).strip()]
+
+
+def _data(asm, args):
+    values = []
+    for arg in _split(args):
+        if arg[0] == '"' or arg[0] == "'" and len(arg) != 3:
+            values.append(arg[1:-1])
+        else:
+            v = value(arg)
+            values.append(asm.label(v) if isinstance(v, str) else v)
+    return values
+
+
+class _MOS6502:
+    def __init__(self, module):
+        self.module = module
+        self.emit, self.opcodes = module._emit, module.OPCODES
+
+    def __call__(self, op, args):
+        m = self.module
+        args = args.strip()
+        opcodes = self.opcodes.get(op.upper())
+        if opcodes is None:
+            raise ValueError(f"Unknown instruction {op}")
+        if not args and "acc" not in opcodes:
+            return self.emit(opcodes)
+        if not args or args.upper() == "A":
+            return self.emit(opcodes, m.A)
+        if args[0] == "#":
+            return self.emit(opcodes, m.I @ value(args[1:]))
+        r = _INDIRECT_X.match(args)
+        if r:
+            return self.emit(opcodes, [value(r.group(1)), m.X])
+        r = _INDIRECT_Y.match(args)
+        if r:
+            return self.emit(opcodes, [value(r.group(1))], m.Y)
+        r = _INDIRECT.match(args)
+        if r:
+            return self.emit(opcodes, [value(r.group(1))])
+        r = _INDEXED.match(args)
+        if r:
+            index = m.X if r.group(2) in "Xx" else m.Y
+            return self.emit(opcodes, value(r.group(1)), index)
+        return self.emit(opcodes, value(args))
+
+
+_HEX = "0123456789ABCDEF"
+
+
+class _CHIP8:
+    # Operands written as keywords rather than values
+    KEYWORDS = {"I", "[I]", "DT", "ST", "K", "F", "B", "HF", "R"}
+
+    def __init__(self, module):
+        self.module, self.emit = module, module._emit
+        self.forms = {}
+        # Match the written syntax of each encoding, then pass the operands
+        # in the order the Python functions take them
+        for name, operands, _, syntax in module.ENCODINGS:
+            written = syntax.split(None, 1)[1].split(", ") if operands else []
+            form = [w[1:-1] if w[0] == "{" else w for w in written]
+            self.forms.setdefault(name, []).append((form, operands))
+
+    def __call__(self, op, args):
+        name = op.upper()
+        forms = self.forms.get(name)
+        if forms is None:
+            raise ValueError(f"Unknown instruction {op}")
+        args = _split(args)
+        upper = [a.upper() for a in args]
+        for form, operands in forms:
+            if len(form) != len(args):
+                continue
+            fields = {}
+            for written, arg, up in zip(form, args, upper):
+                is_reg = len(up) == 2 and up[0] == "V" and up[1] in _HEX
+                if written in ("x", "y"):
+                    if not is_reg:
+                        break
+                    fields[written] = up
+                elif written in ("kk", "n", "nnn"):
+                    if is_reg or up in self.KEYWORDS:
+                        break
+                    fields[written] = value(arg)
+                elif written != up:
+                    break
+            else:
+                return self.emit(name, *[fields.get(o, o) for o in operands])
+        raise ValueError(f"Invalid operands for {name}: {', '.join(args)}")
+
+
+class _Generic:
+    def __init__(self, module):
+        self.module = module
+        self.aliases = _ALIASES.get(module.__name__, {})
+
+    def operand(self, arg):
+        m = self.module
+        if arg[0] == "@":  # SWEET16 indirect register
+            return [self.operand(arg[1:])]
+        const = getattr(m, arg.upper(), None) if arg.isidentifier() else None
+        if isinstance(const, int):
+            return const
+        return value(arg)
+
+    def __call__(self, op, args):
+        # Each instruction is exported under its upper-case mnemonic
+        name = self.aliases.get(op.upper(), op.upper())
+        fn = getattr(self.module, name, None)
+        if not callable(fn):
+            raise ValueError(f"Unknown instruction {op}")
+        return fn(*[self.operand(a) for a in _split(args)])
+
+
+_FRONTENDS = {"asmy.mos6502": _MOS6502, "asmy.chip8": _CHIP8}
+_CACHE = {}
+
+
+def assemble(lines, arch):
+    """Assemble source text for arch into its current assembler.
+
+    lines is a string or any iterable of lines, such as an open file, which
+    is consumed one line at a time. Supports `label:`, `; comments`, the
+    `.org`, `.db`/`.byte` and `.dw`/`.word` directives and the classic
+    syntax of each architecture, e.g. `LDA ($10),Y` or `LD V0, [I]`. With a
+    listing enabled, each source line becomes a row pointing at its file
+    and line.
+    """
+    filename = getattr(lines, "name", "<string>")
+    if isinstance(lines, str):
+        lines = lines.splitlines()
+    name = _module(arch)
+    frontend = _CACHE.get(name)
+    if frontend is None:
+        module = importlib.import_module(name)
+        frontend = _CACHE[name] = _FRONTENDS.get(name, _Generic)(module)
+    module = frontend.module
+    asm = module.asm.get()
+    listing = asm.listing
+    org = getattr(module, "org", asm.org)
+    match = _LINE.match
+    for n, line in enumerate(lines, 1):
+        m = match(line)
+        try:
+            if m is None:
+                raise ValueError("Syntax error")
+            label, op, args = m.group("label", "op", "args")
+            if label:
+                with asm.label(label):
+                    pass
+            if not op:
+                continue
+            if listing is not None:
+                listing.replay(op.upper(), (filename, n))
+            directive = op.lower()
+            if directive == ".org":
+                org(value(args))
+            elif directive in (".db", ".byte"):
+                asm.db(*_data(asm, args))
+            elif directive in (".dw", ".word"):
+                asm.dw(*_data(asm, args))
+            elif op[0] == ".":
+                raise ValueError(f"Unknown directive {op}")
+            else:
+                frontend(op, args or "")
+        except (ValueError, OverflowError, TypeError) as e:
+            raise ValueError(f"line {n}: {e}") from None
+
+
+def assemble_file(path, arch):
+    """Assemble a source file for arch, reading it line by line."""
+    with open(path) as f:
+        assemble(f, arch)
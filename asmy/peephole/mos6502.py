@@ -0,0 +1,145 @@
+from ..emu.mos6502 import CYCLES
+from ..mos6502 import OPCODES, SIZES, _emit, asm
+
+_JMP, _JSR, _RTS = OPCODES["JMP"]["abs"], OPCODES["JSR"]["abs"], OPCODES["RTS"]["imp"]
+
+# Mnemonic of every opcode, for listing rows
+_NAMES = {op: name for name, modes in OPCODES.items() for op in modes.values()}
+
+# Store opcode -> load opcode from the same operand
+_RELOADS = {
+    OPCODES[store][mode]: OPCODES[load][mode]
+    for load, store in (("LDA", "STA"), ("LDX", "STX"), ("LDY", "STY"))
+    for mode in OPCODES[store]
+    if mode in OPCODES[load]
+}
+
+# Flag instructions that do nothing when repeated
+_FLAGS = {
+    OPCODES[name]["imp"] for name in ("CLC", "SEC", "CLD", "SED", "CLI", "SEI", "CLV")
+}
+
+
+# Rules rewrite a pair of adjacent instructions, with no label between them,
+# into a shorter list. Recorded instructions are (opcode, mode, operand,
+# arguments of asmy.mos6502._emit).
+def _store_after_load(prev, cur, volatile):
+    # LDA x; STA x
+    if _RELOADS.get(cur[0]) == prev[0] and prev[2] == cur[2]:
+        if cur[2] not in volatile:
+            return [prev]
+    return None
+
+
+def _repeated_flag(prev, cur, volatile):
+    # CLC; CLC
+    if prev[0] == cur[0] and cur[0] in _FLAGS:
+        return [prev]
+    return None
+
+
+def _tail_call(prev, cur, volatile):
+    # JSR f; RTS -> JMP f
+    if prev[0] == _JSR and cur[0] == _RTS:
+        return [(_JMP, "abs", prev[2], (OPCODES["JMP"], prev[2], None))]
+    return None
+
+
+RULES = [
+    ("LDA x; STA x", _store_after_load),
+    ("CLC; CLC", _repeated_flag),
+    ("JSR f; RTS", _tail_call),
+]
+
+
+class Peephole:
+    """Peephole optimizer for a block of 6502 code.
+
+    Used as a context manager, it records the instructions, labels and data
+    emitted inside the with block and emits them rewritten on exit, so label
+    addresses and branch offsets follow the shorter code. Sections, blocks
+    and direct fixup() calls cannot be used inside. Stores to the
+    addresses or labels in volatile, such as I/O registers, are kept.
+    Afterwards bytes and cycles hold the savings and rules counts the
+    rewrites by rule.
+    """
+
+    def __init__(self, volatile=()):
+        self.volatile = volatile
+        self.bytes = 0
+        self.cycles = 0
+        self.rules = {}
+        self.assembler = None
+
+    def __enter__(self):
+        a = self.assembler = asm.get()
+        if a.trace is not None:
+            raise ValueError("Nested peephole blocks are not supported")
+        a.trace = []
+        return self
+
+    def __exit__(self, exc_type, *args):
+        a = self.assembler
+        trace, a.trace = a.trace, None
+        if exc_type is None:
+            self.replay(self.rewrite(trace))
+
+    def _count(self, rule, removed, added):
+        self.rules[rule] = self.rules.get(rule, 0) + 1
+        for sign, items in ((1, removed), (-1, added)):
+            for item in items:
+                self.bytes += sign * SIZES[item[1]]
+                self.cycles += sign * CYCLES[item[0]]
+
+    def rewrite(self, trace):
+        """Return the recorded trace with the rules applied.
+
+        The trace is scanned once. Rewritten instructions are fed back in
+        front of the rest of the input, so they can combine again with the
+        instruction before them, and each rewrite shortens the code, which
+        keeps the scan linear.
+        """
+        out, pending = [], trace[::-1]
+        while pending:
+            item = pending.pop()
+            kind = item[0]
+            if kind == "label":
+                # JMP to the instruction right after it
+                i = len(out) - 1
+                while i >= 0 and out[i][0] == "label":
+                    i -= 1
+                if i >= 0 and out[i][0] == _JMP and out[i][2] == item[1]:
+                    self._count("JMP next", [out.pop(i)], [])
+            elif isinstance(kind, int) and out and isinstance(out[-1][0], int):
+                for rule, fn in RULES:
+                    replacement = fn(out[-1], item, self.volatile)
+                    if replacement is not None:
+                        self._count(rule, [out.pop(), item], replacement)
+                        pending.extend(reversed(replacement))
+                        break
+                else:
+                    out.append(item)
+                continue
+            out.append(item)
+        return out
+
+    def replay(self, code):
+        """Emit rewritten code into the assembler."""
+        a = self.assembler
+        for item in code:
+            kind = item[0]
+            if kind == "label":
+                with a.label(item[1]):
+                    pass
+                continue
+            if a.listing is not None:
+                a.listing.replay(_NAMES.get(kind, kind))
+            if isinstance(kind, int):
+                _emit(*item[3])
+            else:
+                getattr(a, kind)(*item[1])
+
+
+def optimize(volatile=()):
+    """Optimize the 6502 code emitted in a with block, see Peephole."""
+    return Peephole(volatile)
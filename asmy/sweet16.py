@@ -1,8 +1,9 @@
-from .assembler import Assembler
+from .assembler import REL8, Assembler, CurrentAssembler
 
-asm = Assembler(endian="big", pc_start=0)
+asm = CurrentAssembler(Assembler(endian="big", pc_start=0))
 label = lambda name: asm.label(name)
-org, db = asm.org, asm.db
+org = lambda addr: asm.org(addr)
+db = lambda *values: asm.db(*values)
 
 
 R0, R1, R2, R3, R4, R5, R6, R7, R8, R9, R10, R11, R12, R13, R14, R15 = range(16)
@@ -19,11 +20,8 @@ def _emit_byte(b):
 def _fixup_branch(opcode, label_name):
     """Fixup for two-byte relative branches."""
 
-    def patch(rom, pos, target_addr):
-        rom[pos] = (target_addr - pos - 1) & 0xFF
-
     asm.db(opcode)
-    asm.fixup(label_name, 1, patch)
+    asm.fixup(label_name, 1, REL8, asm.pc + 1)
 
 
 def rtn():
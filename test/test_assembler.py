@@ -1,5 +1,10 @@
+import io
+import os
+import tempfile
+import time
 import unittest
-from asmy.assembler import Assembler
+from array import array
+from asmy.assembler import ABS_LE, Assembler, Expr, hi, lo
 
 
 class TestAssemblerCore(unittest.TestCase):
@@ -67,6 +72,166 @@ class TestAssemblerCore(unittest.TestCase):
         self.assertEqual(bytes(asm.rom[8:9]), b"\x02")
         self.assertEqual(len(asm.rom), 9)
 
+    def test_sections(self):
+        asm = Assembler(pc_start=0x8000)
+        asm.db(0xEA)
+        with asm.section("vectors", 0xFFFA):
+            asm.dw(asm.label("nmi"), asm.label("reset"), asm.label("nmi"))
+        with asm.label("reset"):
+            asm.db(0x4C)
+            asm.dw(asm.label("reset"))
+        with asm.section("data", 0x9000):
+            asm.db("hi")
+        with asm.label("nmi"):
+            asm.db(0x40)
+        self.assertEqual(len(asm.sections["vectors"].rom), 6)
+        self.assertEqual(
+            asm.finalize(chunks=True),
+            [
+                (0x8000, bytes.fromhex("ea 4c 01 80 40")),
+                (0x9000, b"hi"),
+                (0xFFFA, bytes.fromhex("04 80 01 80 04 80")),
+            ],
+        )
+        rom = asm.finalize()
+        self.assertEqual(len(rom), 0x8000)
+        self.assertEqual(rom[0x1000:0x1002], b"hi")
+        self.assertEqual(rom[-6:], bytes.fromhex("04 80 01 80 04 80"))
+
+    def test_section_reentry(self):
+        asm = Assembler()
+        asm.db(1)
+        with asm.section("data", 0x100):
+            asm.db(2)
+            with asm.section("bss", 0x200):
+                with asm.section("data"):
+                    asm.db(3)
+                asm.db(4)
+            asm.db(5)
+        asm.db(6)
+        self.assertEqual(
+            asm.finalize(chunks=True),
+            [(0, b"\x01\x06"), (0x100, b"\x02\x03\x05"), (0x200, b"\x04")],
+        )
+
+    def test_section_errors(self):
+        asm = Assembler()
+        with self.assertRaises(ValueError):
+            asm.section("data")
+        asm.db(1, 2, 3)
+        with asm.section("data", 2):
+            asm.db(4)
+        with self.assertRaises(ValueError):
+            asm.section("data", 4)
+        with self.assertRaises(ValueError):
+            asm.finalize()
+
+    def test_stream(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "rom.bin")
+            asm = Assembler(pc_start=0x100, out=path)
+            asm.FLUSH_SIZE = 4
+            asm.dw(asm.label("end"))
+            with asm.label("start"):
+                asm.db(*range(10))
+            self.assertLess(len(asm.rom), 4)
+            asm.dw(asm.label("start"))
+            with asm.section("tail", 0x120):
+                asm.db(0xFF)
+            with asm.label("end"):
+                asm.db(0xEE)
+            rom = asm.finalize()
+            self.assertIsInstance(rom, memoryview)
+            expected = bytes.fromhex("0e 01 00 01 02 03 04 05 06 07 08 09 02 01 ee")
+            self.assertEqual(rom[:15], expected)
+            self.assertEqual(rom[0x20], 0xFF)
+            chunks = asm.finalize(chunks=True)
+            self.assertEqual([a for a, _ in chunks], [0x100, 0x120])
+            self.assertEqual(bytes(chunks[0][1]), expected)
+            del rom, chunks
+            asm.close()
+            self.assertTrue(asm.out.closed)
+            with open(path, "rb") as f:
+                self.assertEqual(f.read(15), expected)
+        with self.assertRaisesRegex(ValueError, "descriptor"):
+            Assembler(out=io.BytesIO())
+
+    def test_fixup_columns(self):
+        asm = Assembler()
+        n = 20000
+
+        def patch(rom, pos, addr):
+            rom[pos] = addr & 0xFF
+
+        for _ in range(n):
+            asm.fixup("end", 2, ABS_LE)
+            asm.fixup("end", 1, patch)
+        # Pending references are plain array columns, with no tuple or
+        # closure kept per reference and custom patchers stored once
+        fixups = asm.fixups
+        for column in (fixups.kind, fixups.size, fixups.pos, fixups.arg):
+            self.assertIsInstance(column, array)
+            self.assertEqual(len(column), 2 * n)
+        self.assertEqual(fixups.patchers, [patch])
+        self.assertEqual(list(fixups), ["end"])
+        with asm.label("end"):
+            pass
+        rom = asm.finalize()
+        self.assertEqual(rom, ((3 * n).to_bytes(2, "little") + b"\x60") * n)
+
+    def test_expressions(self):
+        asm = Assembler()
+        calls = []
+
+        def patch(rom, pos, addr):
+            calls.append(addr)
+            rom[pos] = addr
+
+        size = asm.label("end") - asm.label("start")
+        for _ in range(3):
+            asm.fixup(size, 1, patch)
+        asm.fixup(lo(asm.label("end") + 0x100), 1, patch)
+        with asm.label("start"):
+            asm.db(0)
+        self.assertEqual(asm.waiting, {"end": [size, lo(Expr("+", "end", 0x100))]})
+        with asm.label("end"):
+            asm.dw(size, hi(0x1234))
+        self.assertEqual(asm.finalize().hex(" "), "01 01 01 05 00 01 00 12 00")
+        self.assertEqual(calls, [1, 1, 1, 5])
+        self.assertEqual(asm.waiting, {})
+
+    def test_current(self):
+        default = Assembler()
+        self.assertIs(Assembler.current(default), default)
+        with Assembler() as a:
+            self.assertIs(Assembler.current(default), a)
+            with Assembler() as b:
+                self.assertIs(Assembler.current(), b)
+            self.assertIs(Assembler.current(), a)
+        self.assertIsNone(Assembler.current())
+
+    @unittest.skipUnless(os.environ.get("ASMY_BENCH"), "set ASMY_BENCH=1 to run")
+    def test_fixup_scaling(self):
+        def patch(rom, pos, addr):
+            rom[pos : pos + 2] = (addr & 0xFFFF).to_bytes(2, "little")
+
+        def build(n):
+            # All references are forward, so every label has pending fixups
+            asm = Assembler()
+            t = time.perf_counter()
+            for i in range(n):
+                asm.fixup(f"l{i}", 2, patch)
+            for i in range(n):
+                with asm.label(f"l{i}"):
+                    asm.db(0)
+            asm.finalize()
+            return time.perf_counter() - t
+
+        small = min(build(25000) for _ in range(2))
+        large = min(build(100000) for _ in range(2))
+        # Linear growth would give ~4x, quadratic ~16x
+        self.assertLess(large / small, 10)
+
 
 if __name__ == "__main__":
     unittest.main()
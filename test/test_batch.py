@@ -0,0 +1,24 @@
+import unittest
+from functools import partial
+from asmy import batch
+from asmy.chip8 import *
+
+
+def program(n):
+    with label("start"):
+        ld(V0, n)
+        jp("start")
+
+
+class TestBatch(unittest.TestCase):
+    def test_build(self):
+        builders = [partial(program, n) for n in range(20)]
+        results = batch.build(builders, "chip8", max_workers=2)
+        self.assertEqual(len(results), 20)
+        for n, (rom, labels) in enumerate(results):
+            self.assertEqual(rom, bytes([0x60, n, 0x12, 0x00]))
+            self.assertEqual(labels, {"start": 0x200})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+from functools import partial
+from asmy.cache import Cache
+from asmy.chip8 import *
+
+
+class Calls:
+    # A class only counts by name in cache keys, so logging builds here
+    # leaves the key of program() unchanged
+    log = []
+
+
+def program(n):
+    Calls.log.append(n)
+    with label("start"):
+        ld(V0, n)
+        jp("start")
+
+
+def make(n):
+    def build():
+        ld(V0, n)
+
+    return build
+
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        Calls.log.clear()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_build(self):
+        cache = Cache(self.tmp.name)
+        expected = (bytes([0x60, 1, 0x12, 0x00]), {"start": 0x200})
+        self.assertEqual(cache.build(partial(program, 1), "chip8"), expected)
+        self.assertEqual(cache.build(partial(program, 1), "chip8"), expected)
+        self.assertEqual(Calls.log, [1])
+        # A fresh cache on the same directory shares the entries
+        shared = Cache(self.tmp.name)
+        self.assertEqual(shared.build(partial(program, 1), "chip8"), expected)
+        self.assertEqual(Calls.log, [1])
+        rom, labels = cache.build(partial(program, 1), "chip8", pc_start=0x600)
+        self.assertEqual(rom, bytes([0x60, 1, 0x16, 0x00]))
+        self.assertEqual(Calls.log, [1, 1])
+
+    def test_key(self):
+        cache = Cache(self.tmp.name)
+        self.assertNotEqual(cache.key(make(1), "chip8"), cache.key(make(2), "chip8"))
+        self.assertEqual(cache.key(make(1), "chip8"), cache.key(make(1), "chip8"))
+        self.assertEqual(cache.build(make(1), "chip8")[0], bytes([0x60, 1]))
+        self.assertEqual(cache.build(make(2), "chip8")[0], bytes([0x60, 2]))
+        first, second = (lambda: ld(V0, 1)), (lambda: ld(V1, 1))
+        self.assertNotEqual(cache.key(first, "chip8"), cache.key(second, "chip8"))
+        # Builders reading objects without a stable repr are never cached
+        state = object()
+        builder = lambda: ld(V0, 3 if state else 4)
+        self.assertIsNone(cache.key(builder, "chip8"))
+        self.assertEqual(cache.build(builder, "chip8")[0], bytes([0x60, 3]))
+        self.assertEqual(len(os.listdir(self.tmp.name)), 2)
+
+    def test_evict(self):
+        cache = Cache(self.tmp.name, max_size=40)
+        keys = [cache.key(partial(program, n), "chip8") for n in range(4)]
+
+        def touch(n, t):
+            os.utime(os.path.join(self.tmp.name, keys[n]), ns=(t, t))
+
+        for n in range(4):
+            cache.build(partial(program, n), "chip8")
+            touch(n, n * 10**9)
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), sorted(keys[-2:]))
+        # Hits refresh an entry, so the least recently used one goes first
+        cache.build(partial(program, 2), "chip8")
+        cache.build(partial(program, 0), "chip8")
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), sorted(keys[0:3:2]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,4 @@
+import threading
 import unittest
 from asmy.chip8 import *
 
@@ -66,6 +67,26 @@ class TestChip8(unittest.TestCase):
             ),
         )
 
+    def test_concurrent(self):
+        roms = {}
+
+        def build(n):
+            with asm.new() as a:
+                with label("start"):
+                    for _ in range(100):
+                        ld(V0, n)
+                    jp("start")
+                roms[n] = a.finalize()
+
+        threads = [threading.Thread(target=build, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        for n in range(8):
+            self.assertEqual(roms[n], bytes([0x60, n]) * 100 + b"\x12\x00")
+        self.assertEqual(len(asm.rom), 0)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,87 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from asmy import cli
+
+SCRIPT = """from asmy.chip8 import *
+
+with label("start"):
+    ld(V0, 1)
+    jp("start")
+"""
+
+
+class TestCLI(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.dir, name)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def read(self, name):
+        with open(os.path.join(self.dir, name), "rb") as f:
+            return f.read()
+
+    def test_build(self):
+        a = self.write("a.py", SCRIPT)
+        b = self.write("b.s", "CLS\nloop: JP loop\n")
+        self.assertEqual(cli.main(["-a", "chip8", "-j", "2", a, b]), 0)
+        self.assertEqual(self.read("a.bin").hex(), "60011200")
+        self.assertEqual(self.read("b.bin").hex(), "00e01202")
+
+    def test_formats(self):
+        b = self.write("b.s", "CLS\nloop: JP loop\n")
+        self.assertEqual(cli.main(["-a", "chip8", "-f", "ihex", b]), 0)
+        self.assertEqual(self.read("b.ihx"), b":0402000000E0120206\n:00000001FF\n")
+        out = os.path.join(self.dir, "out.txt")
+        self.assertEqual(cli.main(["-a", "chip8", "-f", "hex", "-o", out, b]), 0)
+        self.assertEqual(self.read("out.txt"), b"@0200\n00 e0 12 02\n")
+
+    def test_errors(self):
+        bad = self.write("bad.s", "CLS\nFOO\n")
+        good = self.write("good.s", "CLS\n")
+        self.assertEqual(cli.main(["-a", "chip8", "-j", "1", bad, good]), 1)
+        self.assertFalse(os.path.exists(os.path.join(self.dir, "bad.bin")))
+        self.assertEqual(self.read("good.bin").hex(), "00e0")
+
+    def test_watch(self):
+        src = self.write("w.s", "CLS\n")
+        out = os.path.join(self.dir, "w.bin")
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ, PYTHONPATH=root)
+        cmd = [sys.executable, "-m", "asmy", "-a", "chip8", "--watch", src]
+        proc = subprocess.Popen(cmd, env=env)
+        try:
+            self.assertTrue(self._wait(out, b"\x00\xe0"))
+            time.sleep(0.05)
+            self.write("w.s", "RET\n")
+            self.assertTrue(self._wait(out, b"\x00\xee"))
+        finally:
+            proc.terminate()
+            proc.wait()
+
+    def _wait(self, path, expected, timeout=10):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                with open(path, "rb") as f:
+                    if f.read() == expected:
+                        return True
+            except OSError:
+                pass
+            time.sleep(0.02)
+        return False
+
+
+if __name__ == "__main__":
+    unittest.main()
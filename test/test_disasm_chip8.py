@@ -0,0 +1,71 @@
+import random
+import unittest
+from asmy import chip8
+from asmy.chip8 import ENCODINGS, asm
+from asmy.disasm.chip8 import decode, disasm
+
+
+def random_args(rng, operands):
+    args = []
+    for kind in operands:
+        if kind in ("x", "y"):
+            args.append(f"V{rng.randrange(16):X}")
+        elif kind == "kk":
+            args.append(rng.randrange(0x100))
+        elif kind == "n":
+            args.append(rng.randrange(0x10))
+        elif kind == "nnn":
+            args.append(rng.randrange(0x1000))
+        else:
+            args.append(kind)
+    return args
+
+
+class TestDisasmChip8(unittest.TestCase):
+    def test_text(self):
+        with asm.new() as a:
+            with chip8.label("start"):
+                chip8.ld(chip8.I, "sprite")
+                chip8.drw(chip8.V0, chip8.V1, 5)
+                chip8.ld(chip8.I, chip8.V3)
+                chip8.add(chip8.V2, chip8.I)
+                chip8.jp("start", chip8.V0)
+                chip8.scd(4)
+            with chip8.label("sprite"):
+                chip8.db(0xFF)
+            rom = a.finalize()
+            labels = dict(a.labels)
+        lines = [text for _, _, text in disasm(rom, labels=labels)]
+        self.assertEqual(
+            lines,
+            [
+                "LD I, sprite",
+                "DRW V0, V1, 5",
+                "LD [I], V3",
+                "ADD I, V2",
+                "JP V0, start",
+                "SCD 4",
+                ".db $FF",
+            ],
+        )
+
+    def test_unknown(self):
+        self.assertIsNone(decode(0x5001))
+        self.assertEqual([t for _, _, t in disasm(b"\xe0\x00")], [".dw $E000"])
+
+    def test_round_trip(self):
+        rng = random.Random(8)
+        with asm.new() as a:
+            for _ in range(20000):
+                name, operands, _, _ = rng.choice(ENCODINGS)
+                getattr(chip8, name)(*random_args(rng, operands))
+            rom = a.finalize()
+        with asm.new() as b:
+            for _, raw, _ in disasm(rom):
+                name, args, _, _ = decode(raw[0] << 8 | raw[1])
+                getattr(chip8, name)(*args)
+            self.assertEqual(b.finalize(), rom)
+
+
+if __name__ == "__main__":
+    unittest.main()
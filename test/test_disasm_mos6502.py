@@ -0,0 +1,71 @@
+import io
+import unittest
+from asmy.mos6502 import *
+from asmy.disasm.mos6502 import DECODE, disasm, dump
+
+
+class TestDisasmMOS6502(unittest.TestCase):
+    def test_table(self):
+        self.assertEqual(sum(entry is not None for entry in DECODE), 151)
+        self.assertEqual(DECODE[0xB1], ("LDA", "iny", 2))
+
+    def test_modes(self):
+        with asm.new() as a:
+            with label("start"):
+                LDA(I @ 0x42)
+                LDA(0x42, X)
+                LDX(0x42, Y)
+                LDA(0x1234, Y)
+                LDA([0x34, X])
+                LDA([0x34], Y)
+                JMP([0x1234])
+                ASL(A)
+                BNE("start")
+                JSR("start")
+                RTS()
+            rom = a.finalize()
+            labels = dict(a.labels)
+        lines = [text for _, _, text in disasm(rom, labels=labels)]
+        self.assertEqual(
+            lines,
+            [
+                "LDA #$42",
+                "LDA $42,X",
+                "LDX $42,Y",
+                "LDA $1234,Y",
+                "LDA ($34,X)",
+                "LDA ($34),Y",
+                "JMP ($1234)",
+                "ASL A",
+                "BNE start",
+                "JSR start",
+                "RTS",
+            ],
+        )
+
+    def test_invalid_and_truncated(self):
+        rom = b"\x02\xea\xad\x00"
+        lines = [(addr, text) for addr, _, text in disasm(rom, 0x8000)]
+        self.assertEqual(
+            lines,
+            [(0x8000, ".db $02"), (0x8001, "NOP"), (0x8002, ".db $AD"), (0x8003, "BRK")],
+        )
+
+    def test_dump(self):
+        out = io.StringIO()
+        dump(b"\xa9\x01\xd0\xfc", out, 0x0600, {"loop": 0x0600})
+        self.assertEqual(
+            out.getvalue(),
+            "loop:\n0600  a9 01     LDA #$01\n0602  d0 fc     BNE loop\n",
+        )
+
+    def test_streaming(self):
+        rom = bytes([0xEA]) * 100000
+        gen = disasm(rom)
+        self.assertEqual(next(gen)[2], "NOP")
+        self.assertIsInstance(next(gen)[1], memoryview)
+        self.assertEqual(sum(1 for _ in gen), 99998)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+import unittest
+from asmy.chip8 import *
+from asmy.emu.chip8 import VM
+
+
+def build(program, **kwargs):
+    with asm.new() as a:
+        program()
+        return VM(a.finalize(), **kwargs)
+
+
+class TestEmuChip8(unittest.TestCase):
+    def test_font(self):
+        def program():
+            ld(V0, 7)
+            ld(F, V0)
+            ld(V1, 1)
+            drw(V1, V1, 5)
+            exit()
+
+        vm = build(program)
+        vm.run(1)
+        self.assertTrue(vm.halted)
+        rows = vm.render().split("\n")
+        self.assertEqual(rows[1][:6], ".####.")
+        self.assertEqual(rows[3][:6], "...#..")
+        self.assertEqual(vm.v[15], 0)
+
+    def test_collision(self):
+        def program():
+            ld(I, "sprite")
+            drw(V0, V0, 1)
+            drw(V0, V0, 1)
+            exit()
+            with label("sprite"):
+                db(0xFF)
+
+        vm = build(program)
+        vm.run(1)
+        self.assertEqual(vm.v[15], 1)
+        self.assertEqual(vm.screen, [0] * 32)
+
+    def test_wrap_and_clip(self):
+        def program():
+            ld(I, "sprite")
+            ld(V0, 60 + 64)
+            drw(V0, V1, 1)
+            exit()
+            with label("sprite"):
+                db(0xFF)
+
+        vm = build(program)
+        vm.run(1)
+        self.assertEqual(vm.screen[0], 0xF)
+
+    def test_scroll(self):
+        def program():
+            high()
+            ld(I, "sprite")
+            drw(V0, V0, 1)
+            scd(2)
+            scr()
+            scr()
+            scl()
+            exit()
+            with label("sprite"):
+                db(0x80)
+
+        vm = build(program)
+        vm.run(1)
+        self.assertEqual((vm.width, vm.height), (128, 64))
+        self.assertTrue(vm.pixel(4, 2))
+        self.assertEqual(sum(map(bool, vm.screen)), 1)
+
+    def test_bcd_and_registers(self):
+        def program():
+            ld(V0, 123)
+            ld(I, 0x300)
+            ld(B, V0)
+            ld(V2, I)
+            ld(R, V2)
+            ld(V0, 0)
+            ld(V2, R)
+            exit()
+
+        vm = build(program)
+        vm.run(1)
+        self.assertEqual(vm.mem[0x300:0x303], b"\x01\x02\x03")
+        self.assertEqual(vm.v[:3], b"\x01\x02\x03")
+
+    def test_memory_wrap(self):
+        def program():
+            ld(V0, 1)
+            ld(V1, 2)
+            ld(V2, 3)
+            ld(I, 0xFFE)
+            ld(I, V2)
+            ld(V0, 0)
+            ld(V1, 0)
+            ld(V2, 0)
+            ld(V2, I)
+            jp(0xFFF)
+
+        vm = build(program)
+        vm.run(1)
+        self.assertEqual(len(vm.mem), 0x1000)
+        self.assertEqual(vm.mem[0xFFE:] + vm.mem[:1], b"\x01\x02\x03")
+        self.assertEqual(vm.v[:3], b"\x01\x02\x03")
+        # The instruction at 0xFFF takes its second byte from 0x000
+        self.assertEqual(vm.pc, 0xFFF)
+        with self.assertRaisesRegex(ValueError, "0203 at FFF"):
+            vm.step()
+
+    def test_subroutine_and_timers(self):
+        def program():
+            ld(V0, 5)
+            ld(DT, V0)
+            call("sub")
+            with label("wait"):
+                ld(V1, DT)
+                se(V1, 0)
+                jp("wait")
+            exit()
+            with label("sub"):
+                add(V2, 1)
+                ret()
+
+        vm = build(program)
+        vm.run(100)
+        self.assertTrue(vm.halted)
+        self.assertEqual(vm.v[2], 1)
+
+    def test_headless_frames(self):
+        def program():
+            with label("loop"):
+                rnd(V0, 0x3F)
+                rnd(V1, 0x1F)
+                ld(I, "dot")
+                drw(V0, V1, 1)
+                jp("loop")
+            with label("dot"):
+                db(0x80)
+
+        vm = build(program, seed=1)
+        vm.run(600)
+        self.assertGreater(sum(bin(row).count("1") for row in vm.screen), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
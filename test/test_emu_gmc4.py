@@ -0,0 +1,100 @@
+import unittest
+from unittest import mock
+from asmy.gmc4 import *
+from asmy.emu.gmc4 import GMC4
+
+
+def build(program, **kwargs):
+    with asm.new() as a:
+        program()
+        return GMC4(a.finalize(), **kwargs)
+
+
+class TestEmuGMC4(unittest.TestCase):
+    def test_packed_memory(self):
+        vm = GMC4(bytes([1, 2, 3]))
+        self.assertEqual(len(vm.mem), 0x30)
+        self.assertEqual(vm.mem[:2], b"\x12\x30")
+        vm.poke(0x5F, 9)
+        self.assertEqual(vm.peek(0x5F), 9)
+        self.assertEqual(vm.peek(0x5E), 0)
+
+    def test_counter(self):
+        def program():
+            tia(0)
+            tiy(0)
+            with label("loop"):
+                ao()
+                aia(1)
+                jump("done")  # on carry
+                jump("loop")
+            with label("done"):
+                jump("done")
+
+        vm = build(program, fast=True)
+        vm.run(max_steps=1000)
+        self.assertEqual(vm.digit, 15)
+        self.assertEqual(vm.a, 0)
+
+    def test_key(self):
+        def program():
+            with label("wait"):
+                ka()
+                jump("wait")
+            am()
+            with label("halt"):
+                jump("halt")
+
+        vm = build(program, fast=True)
+        vm.run(max_steps=100)
+        self.assertEqual(vm.pc, 0)
+        vm.key = 7
+        vm.run(max_steps=100)
+        self.assertEqual(vm.peek(0x50), 7)
+
+    def test_timer_fast_forward(self):
+        def program():
+            tia(9)
+            tiy(0)
+            with label("loop"):
+                timr()
+                sund()
+                aiy(1)
+                jump("done")
+                jump("loop")
+            with label("done"):
+                jump("done")
+
+        vm = build(program, fast=True)
+        with mock.patch("time.sleep") as sleep:
+            vm.run(max_steps=1000)
+        sleep.assert_not_called()
+        self.assertAlmostEqual(vm.time, 16 * 1.1)
+        self.assertEqual(len(vm.sounds), 16)
+
+    def test_decimal_and_leds(self):
+        def program():
+            tiy(0xF)
+            tia(9)
+            am()
+            tia(3)
+            demp()
+            tiy(0xE)
+            tia(5)
+            am()
+            dspr()
+            chng()
+            cmpl()
+            with label("halt"):
+                jump("halt")
+
+        vm = build(program, fast=True)
+        vm.run(max_steps=100)
+        self.assertEqual(vm.peek(0x5F), 2)
+        self.assertEqual(vm.leds, 5 | 2 << 4)
+        self.assertEqual(vm.alt[:3], [5, 0, 0xE])
+        self.assertEqual(vm.a, 0xF)
+
+
+if __name__ == "__main__":
+    unittest.main()
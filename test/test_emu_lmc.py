@@ -0,0 +1,79 @@
+import unittest
+from asmy.lmc import *
+from asmy.emu import lmc
+
+
+def countdown():
+    with label("start"):
+        inp()
+    with label("loop"):
+        out()
+        sta("count")
+        sub("one")
+        sta("count")
+        brp("loop")
+        hlt()
+    with label("one"):
+        dat(1)
+    with label("count"):
+        dat()
+
+
+def adder():
+    inp()
+    sta("x")
+    inp()
+    add("x")
+    out()
+    hlt()
+    with label("x"):
+        dat()
+
+
+def program(builder):
+    with asm.new() as a:
+        builder()
+        return mem()
+
+
+class TestEmuLMC(unittest.TestCase):
+    def test_countdown(self):
+        self.assertEqual(lmc.run(program(countdown), [3]), [3, 2, 1, 0])
+
+    def test_missing_input(self):
+        self.assertIsNone(lmc.run(program(adder), [1]))
+
+    def test_max_steps(self):
+        self.assertIsNone(lmc.run(program(countdown), [999], max_steps=100))
+
+    def test_self_modifying(self):
+        def builder():
+            lda("inst")
+            sta("slot")
+            with label("slot"):
+                hlt()
+            out()
+            hlt()
+            with label("inst"):
+                dat(502)  # becomes "LDA slot" once copied into the slot
+
+        self.assertEqual(lmc.run(program(builder), []), [502])
+
+    def test_batch(self):
+        mem_ = program(adder)
+        batch = [(a, b) for a in range(100) for b in range(100)] * 2
+        results = lmc.run_batch(mem_, batch)
+        self.assertEqual(results, [lmc.run(mem_, inputs) for inputs in batch])
+        self.assertEqual(results[:3], [[0], [1], [2]])
+        self.assertEqual(results[-1], [198])
+        # Lanes diverging, running out of input or out of steps
+        mem_ = program(countdown)
+        batch = [[3], [3], [], [5, 1], [999], [0]]
+        results = lmc.run_batch(mem_, batch, max_steps=100)
+        expected = [lmc.run(mem_, inputs, max_steps=100) for inputs in batch]
+        self.assertEqual(results, expected)
+        self.assertEqual(results[:3], [[3, 2, 1, 0], [3, 2, 1, 0], None])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import os
+import time
+import unittest
+from asmy.mos6502 import *
+from asmy.emu.mos6502 import CPU, C, Z, N, V
+
+
+def run(program, **regs):
+    with asm.new() as a:
+        program()
+        rom = a.finalize()
+    cpu = CPU()
+    cpu.load(rom)
+    for k, v in regs.items():
+        setattr(cpu, k, v)
+    cpu.run(0)
+    return cpu
+
+
+class TestEmuMOS6502(unittest.TestCase):
+    def test_multiply(self):
+        def program():
+            LDA(I @ 0)
+            LDX(I @ 6)
+            with label("loop"):
+                CLC()
+                ADC(I @ 7)
+                DEX()
+                BNE("loop")
+            STA(0x10)
+            BRK()
+
+        cpu = run(program)
+        self.assertEqual(cpu.mem[0x10], 42)
+        self.assertEqual(cpu.cycles, 60)
+        self.assertEqual(cpu.x, 0)
+        self.assertTrue(cpu.p & Z)
+
+    def test_subroutine(self):
+        def program():
+            LDA(I @ 1)
+            JSR("double")
+            JSR("double")
+            STA(0x0200)
+            BRK()
+            with label("double"):
+                PHA()
+                PLA()
+                ASL(A)
+                RTS()
+
+        cpu = run(program)
+        self.assertEqual(cpu.mem[0x0200], 4)
+        self.assertEqual(cpu.sp, 0xFD)
+
+    def test_indirect(self):
+        def program():
+            LDA(I @ 0x00)
+            STA(0x20)
+            LDA(I @ 0x03)
+            STA(0x21)
+            LDY(I @ 0xFF)
+            LDA(I @ 0x55)
+            STA([0x20], Y)
+            LDX(I @ 0x10)
+            LDA([0x10, X])
+            BRK()
+
+        cpu = run(program)
+        self.assertEqual(cpu.mem[0x03FF], 0x55)
+        self.assertEqual(cpu.a, 0x00)
+
+    def test_arithmetic_flags(self):
+        cpu = run(lambda: (CLC(), LDA(I @ 0x7F), ADC(I @ 1), BRK()))
+        self.assertEqual(cpu.a, 0x80)
+        self.assertEqual(cpu.p & (N | V | C | Z), N | V)
+        cpu = run(lambda: (SEC(), LDA(I @ 0x10), SBC(I @ 0x20), BRK()))
+        self.assertEqual(cpu.a, 0xF0)
+        self.assertEqual(cpu.p & C, 0)
+        cpu = run(lambda: (SED(), CLC(), LDA(I @ 0x19), ADC(I @ 0x28), BRK()))
+        self.assertEqual(cpu.a, 0x47)
+        cpu = run(lambda: (SED(), SEC(), LDA(I @ 0x42), SBC(I @ 0x13), BRK()))
+        self.assertEqual(cpu.a, 0x29)
+        cpu = run(lambda: (LDA(I @ 5), CMP(I @ 5), BRK()))
+        self.assertEqual(cpu.p & (C | Z), C | Z)
+
+    def test_page_cross_cycles(self):
+        cpu = run(lambda: (LDX(I @ 0x01), LDA(0x12FF, X), BRK()))
+        self.assertEqual(cpu.cycles, 2 + 5)
+        cpu = run(lambda: (LDX(I @ 0x01), STA(0x12FF, X), BRK()))
+        self.assertEqual(cpu.cycles, 2 + 5)
+
+    def test_jump_to_self(self):
+        def program():
+            LDA(I @ 1)
+            with label("halt"):
+                JMP("halt")
+
+        cpu = run(program)
+        self.assertEqual(cpu.pc, 2)
+
+    def test_illegal_opcode(self):
+        cpu = CPU()
+        cpu.mem[0] = 0x02
+        self.assertRaises(ValueError, cpu.run, 0)
+
+    @unittest.skipUnless(os.environ.get("ASMY_BENCH"), "set ASMY_BENCH=1 to run")
+    def test_speed(self):
+        def program():
+            LDX(I @ 0)
+            LDY(I @ 0)
+            with label("loop"):
+                INX()
+                BNE("loop")
+                INY()
+                BNE("loop")
+            BRK()
+
+        start = time.perf_counter()
+        cpu = run(program)
+        rate = (256 * 256 * 2) / (time.perf_counter() - start)
+        self.assertEqual(cpu.y, 0)
+        self.assertGreater(rate, 100000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+from asmy import mos6502
+from asmy.sweet16 import *
+from asmy.emu.mos6502 import CPU
+from asmy.emu.sweet16 import SW16, Sweet16
+
+
+def build(program):
+    with asm.new() as a:
+        program()
+        return a.finalize()
+
+
+class TestEmuSweet16(unittest.TestCase):
+    def test_memcpy(self):
+        def program():
+            SET(R1, 0x1000)
+            SET(R2, 0x2000)
+            SET(R3, 5)
+            with label("loop"):
+                LD([R1])
+                ST([R2])
+                DCR(R3)
+                BNZ("loop")
+                RTN()
+
+        vm = Sweet16()
+        vm.load(build(program))
+        vm.mem[0x1000:0x1005] = b"hello"
+        vm.run(0)
+        self.assertEqual(vm.mem[0x2000:0x2005], b"hello")
+        self.assertEqual(vm.r[1], 0x1005)
+        self.assertFalse(vm.brk)
+
+    def test_arithmetic(self):
+        def program():
+            SET(R1, 1)
+            SET(R2, 2)
+            SET(R0, 0xFFFF)
+            ADD(R1)
+            BNC("fail")
+            ST(R3)
+            SUB(R2)
+            ST(R4)
+            BM("ok")
+            with label("fail"):
+                BK()
+            with label("ok"):
+                CPR(R4)
+                BNZ("fail")
+                RTN()
+
+        vm = Sweet16()
+        vm.load(build(program))
+        vm.run(0)
+        self.assertFalse(vm.brk)
+        self.assertEqual(vm.r[3], 0)
+        self.assertEqual(vm.r[4], 0xFFFE)
+
+    def test_double_and_stack(self):
+        def program():
+            SET(R12, 0x0100)
+            SET(R1, 0x0300)
+            SET(R0, 0x1234)
+            STD([R1])
+            BS("sub")
+            RTN()
+            with label("sub"):
+                POPD([R1])
+                ST(R5)
+                RS()
+
+        vm = Sweet16()
+        vm.load(build(program))
+        vm.run(0)
+        self.assertEqual(vm.mem[0x300:0x302], b"\x34\x12")
+        self.assertEqual(vm.r[5], 0x1234)
+        self.assertEqual(vm.r[12], 0x0100)
+
+    def test_coprocessor(self):
+        def program():
+            mos6502.LDA(mos6502.I @ 7)
+            mos6502.JSR(SW16)
+            SET(R1, 40)
+            SET(R2, 2)
+            LD(R1)
+            ADD(R2)
+            ST(R3)
+            RTN()
+            mos6502.LDX(0x06)  # low byte of R3
+            mos6502.BRK()
+
+        cpu = CPU()
+        cpu.load(build(program))
+        Sweet16().attach(cpu)
+        cpu.run(0)
+        self.assertEqual(cpu.x, 42)
+        self.assertEqual(cpu.a, 7)
+        self.assertEqual(cpu.sp, 0xFD)
+
+
+if __name__ == "__main__":
+    unittest.main()
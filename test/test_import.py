@@ -0,0 +1,57 @@
+import os
+import subprocess
+import sys
+import unittest
+from asmy import ARCHITECTURES
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules an architecture may pull in on top of a bare interpreter
+ALLOWED = {
+    "array",
+    "bisect",
+    "_bisect",
+    "collections",
+    "collections.abc",
+    "_collections",
+    "contextvars",
+    "_contextvars",
+    "itertools",
+    "keyword",
+    "operator",
+    "_operator",
+    "reprlib",
+    "asmy",
+    "asmy.assembler",
+    "asmy.listing",
+}
+
+
+def modules(code):
+    # Modules loaded after running code in a fresh interpreter
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    code += "\nimport sys; print(*sys.modules, sep='\\n')"
+    cmd = [sys.executable, "-c", code]
+    out = subprocess.run(cmd, env=env, capture_output=True, text=True, check=True)
+    return set(out.stdout.split())
+
+
+class TestImport(unittest.TestCase):
+    def test_cold_start(self):
+        baseline = modules("pass")
+        for arch in ARCHITECTURES:
+            extra = modules(f"import asmy.{arch}") - baseline - ALLOWED
+            self.assertEqual(extra, {f"asmy.{arch}"}, arch)
+
+    def test_lazy(self):
+        loaded = modules("import asmy")
+        self.assertEqual({m for m in loaded if m.startswith("asmy")}, {"asmy"})
+        import asmy
+
+        self.assertIs(asmy.chip8, sys.modules["asmy.chip8"])
+        with self.assertRaises(AttributeError):
+            asmy.z80
+
+
+if __name__ == "__main__":
+    unittest.main()
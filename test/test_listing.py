@@ -0,0 +1,77 @@
+import io
+import sys
+import unittest
+from asmy import chip8
+from asmy.listing import symbols
+from asmy.mos6502 import *
+
+
+class TestListing(unittest.TestCase):
+    def test_mos6502(self):
+        with asm.new(pc_start=0x600, listing=True) as a:
+            line = self._line()
+            with label("loop"):
+                LDA(I @ 6)
+                for _ in range(2):
+                    INX()
+                BNE("loop")
+            with label("msg"):
+                a.db("HI", 0)
+            a.finalize()
+            rows = [
+                (addr, raw.hex(), name, n - line)
+                for addr, raw, name, _, n in a.listing
+            ]
+        self.assertEqual(
+            rows,
+            [
+                (0x600, "a906", "LDA", 2),
+                (0x602, "e8", "INX", 4),
+                (0x603, "e8", "INX", 4),
+                (0x604, "d0fa", "BNE", 5),
+                (0x606, "484900", "db", 7),
+            ],
+        )
+        out = io.StringIO()
+        a.listing.write(out)
+        first = out.getvalue().splitlines()[0].split()
+        self.assertEqual(first[:4], ["0600", "a9", "06", "LDA"])
+        self.assertTrue(first[4].endswith(f"test_listing.py:{line + 2}"))
+
+    def test_relax(self):
+        with asm.new(relax=True, listing=True) as a:
+            BEQ("far")
+            a.db(*range(200))
+            with label("far"):
+                RTS()
+            a.finalize()
+            rows = [(addr, len(data), name) for addr, data, name, _, _ in a.listing]
+        self.assertEqual(rows, [(0, 5, "BEQ"), (5, 200, "db"), (205, 1, "RTS")])
+
+    def test_chip8(self):
+        with chip8.asm.new(listing=True) as a:
+            chip8.cls()
+            chip8.ld(chip8.V0, 1)
+            self.assertEqual([name for _, _, name, _, _ in a.listing], ["cls", "ld"])
+
+    def test_disabled(self):
+        with asm.new() as a:
+            NOP()
+            self.assertIsNone(a.listing)
+
+    def test_symbols(self):
+        labels = {"start": 0x600, "zp": 0x10}
+        out = io.StringIO()
+        symbols(labels, out)
+        self.assertEqual(out.getvalue(), "al C:0010 .zp\nal C:0600 .start\n")
+        out = io.StringIO()
+        symbols(labels, out, "mame")
+        self.assertEqual(out.getvalue(), "comadd 0010,zp\ncomadd 0600,start\n")
+
+    @staticmethod
+    def _line():
+        return sys._getframe(1).f_lineno
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,16 @@
+import os
+import time
 import unittest
 from asmy.mos6502 import *
 
 
+VALUE = 1
+
+
+def helper():
+    LDA(I @ VALUE)
+
+
 class TestMOS6502(unittest.TestCase):
     def setUp(self):
         asm.reset()
@@ -275,3 +284,228 @@ class TestMOS6502(unittest.TestCase):
             asm.rom.hex(" "),
             "90 fe b0 0f f0 fa 30 0b d0 f6 10 07 50 f2 70 03 4c 00 00 20 13 00",
         )
+
+    def test_branch_range(self):
+        with self.assertRaises(ValueError):
+            BNE("far")
+            asm.org(0x100)
+            with label("far"):
+                NOP()
+
+    def test_relax(self):
+        with asm.new(relax=True) as a:
+            with label("start"):
+                BNE("near")
+                BEQ("far")
+            with label("near"):
+                for _ in range(126):
+                    NOP()
+                BCC("start")
+            with label("far"):
+                RTS()
+            rom = a.finalize()
+            # BEQ far no longer fits and becomes BNE +3; JMP far, which in turn
+            # pushes BCC start out of range
+            self.assertEqual(rom[:9].hex(" "), "d0 05 d0 03 4c 8a 00 ea ea")
+            self.assertEqual(rom[-6:].hex(" "), "b0 03 4c 00 00 60")
+            self.assertEqual(a.labels, {"start": 0, "near": 7, "far": 0x8A})
+
+    def test_relax_org(self):
+        with asm.new(relax=True) as a:
+            a.org(0x600)
+            with label("loop"):
+                BNE("data")
+                JMP("loop")
+            a.org(0x700)
+            with label("data"):
+                a.dw(a.label("loop"))
+            rom = a.finalize()
+            self.assertEqual(rom[0x600:0x608].hex(" "), "f0 03 4c 00 07 4c 00 06")
+            self.assertEqual(rom[0x700:].hex(" "), "00 06")
+        with asm.new(relax=True) as a:
+            BNE("end")
+            for _ in range(128):
+                NOP()
+            a.org(0x82)
+            with label("end"):
+                RTS()
+            with self.assertRaises(ValueError):
+                a.finalize()
+
+    def test_relax_zeropage(self):
+        with asm.new(relax=True) as a:
+            with label("ptr"):
+                a.dw(0)
+            a.org(0x10)
+            LDA("ptr")
+            STA("count", X)
+            LDX("count", Y)
+            STA("buf", Y)
+            JMP("buf")
+            a.org(0xF0)
+            with label("count"):
+                a.db(0)
+            with label("buf"):
+                a.db(0)
+            rom = a.finalize()
+            self.assertEqual(
+                rom[0x10:0x1E].hex(" "),
+                "a5 00 95 f0 b6 f0 99 f1 00 4c f1 00 00 00",
+            )
+        with asm.new(relax=True) as a:
+            LDA("var")
+            a.org(0x100)
+            with label("var"):
+                a.db(0)
+            self.assertEqual(a.finalize()[:3].hex(" "), "ad 00 01")
+
+    def test_sections(self):
+        with asm.new(pc_start=0x8000, relax=True) as a:
+            with a.section("zp", 0x80):
+                with label("ptr"):
+                    a.dw(0)
+            with a.section("code"):
+                with label("loop"):
+                    LDA("ptr")
+                    BNE("loop")
+            self.assertEqual(
+                a.finalize(chunks=True),
+                [(0x80, bytes(2)), (0x8000, bytes.fromhex("a5 80 d0 fc"))],
+            )
+        with asm.new(pc_start=0x8000) as a:
+            with label("loop"):
+                BNE("loop")
+            self.assertEqual(a.finalize().hex(" "), "d0 fe")
+
+    def test_blocks(self):
+        def main():
+            LDX(I @ 0)
+            JSR("print")
+            JMP("main")
+
+        def print_v1():
+            LDA("msg", X)
+            BEQ("done")
+            STA(0xD012)
+            INX()
+            BNE("print")
+            with label("done"):
+                RTS()
+
+        def print_v2():
+            LDA("msg", X)
+            BEQ("done")
+            JSR(0xFFEF)
+            INX()
+            BNE("print")
+            with label("done"):
+                RTS()
+
+        def data(text):
+            asm.db(text, 0)
+
+        def build(a, print_fn, text="HI"):
+            reused = [
+                a.block("main", main),
+                a.block("print", print_fn),
+                a.block("msg", data, text),
+            ]
+            return a.finalize(), reused
+
+        with asm.new(pc_start=0x600) as a:
+            rom, reused = build(a, print_v1)
+            self.assertEqual(reused, [False, False, False])
+            a.reset()
+            self.assertEqual(build(a, print_v1), (rom, [True, True, True]))
+            # Same size, so the data block after it is replayed and re-patched
+            a.reset()
+            rom, reused = build(a, print_v2)
+            self.assertEqual(reused, [True, False, True])
+            with asm.new(pc_start=0x600) as b:
+                self.assertEqual(rom, build(b, print_v2)[0])
+            a.reset()
+            rom, reused = build(a, print_v2, "HELLO")
+            self.assertEqual(reused, [True, True, False])
+            self.assertEqual(rom[-6:], b"HELLO\0")
+
+    def test_blocks_globals(self):
+        global VALUE, helper
+        self.addCleanup(globals().update, VALUE=VALUE, helper=helper)
+
+        def routine():
+            helper()
+            RTS()
+
+        with asm.new() as a:
+            a.block("r", routine)
+            self.assertEqual(a.finalize().hex(), "a90160")
+            VALUE = 2
+            a.reset()
+            self.assertFalse(a.block("r", routine))
+            self.assertEqual(a.finalize().hex(), "a90260")
+            helper = lambda: LDX(I @ VALUE)
+            a.reset()
+            self.assertFalse(a.block("r", routine))
+            self.assertEqual(a.finalize().hex(), "a20260")
+            a.reset()
+            self.assertTrue(a.block("r", routine))
+
+    def test_relax_expression_branch(self):
+        with asm.new(relax=True) as a:
+            BEQ("far")
+            with label("here"):
+                BNE(label("here") + 2)
+            a.org(0x200)
+            with label("far"):
+                RTS()
+            rom = a.finalize()
+        self.assertEqual(rom[:7].hex(" "), "d0 03 4c 00 02 d0 00")
+
+    def test_expressions(self):
+        with asm.new(pc_start=0x600) as a:
+            with label("start"):
+                LDA(I @ lo("table"))
+                LDX(I @ hi("table"))
+                JMP(label("start") + 3)
+                LDA(label("table") + 1, X)
+                a.dw(label("end") - label("table"))
+            a.org(0x1234)
+            with label("table"):
+                a.db(1, 2, 3)
+            with label("end"):
+                pass
+            rom = a.finalize()
+        self.assertEqual(
+            rom[:15].hex(" "), "a9 34 a2 12 4c 03 06 bd 35 12 03 00 00 00 00"
+        )
+        with asm.new() as a:
+            LDA(I @ lo("missing"))
+            with self.assertRaises(ValueError) as e:
+                a.finalize()
+            self.assertIn("lo(missing)", str(e.exception))
+
+    def emit_mix(self, n):
+        with label("start"):
+            for _ in range(n):
+                LDA(I @ 1)
+                STA(0x42)
+                ADC(0x1234, X)
+                LDA([0x34], Y)
+                CLC()
+                JMP("start")
+                INX()
+                RTS()
+        return asm.finalize()
+
+    def test_emit_mix(self):
+        rom = self.emit_mix(3)
+        self.assertEqual(rom.hex(), "a90185427d3412b134184c0000e860" * 3)
+
+    @unittest.skipUnless(os.environ.get("ASMY_BENCH"), "set ASMY_BENCH=1 to run")
+    def test_emit_throughput(self):
+        n = 2000
+        start = time.perf_counter()
+        self.emit_mix(n)
+        rate = 8 * n / (time.perf_counter() - start)
+        # ~200k instructions/s with per-call opcode dicts, ~700k with tables
+        self.assertGreater(rate, 100000)
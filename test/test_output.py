@@ -0,0 +1,74 @@
+import io
+import unittest
+from asmy import chip8, mos6502, output
+
+
+class TestOutput(unittest.TestCase):
+    def test_ihex(self):
+        out = io.StringIO()
+        output.ihex(bytes([0x00, 0xE0, 0x12, 0x02]), out, base=0x200)
+        self.assertEqual(out.getvalue(), ":0402000000E0120206\n:00000001FF\n")
+
+    def test_ihex_skip_zero(self):
+        with chip8.asm.new() as a:
+            chip8.cls()
+            chip8.org(0x240)
+            chip8.ret()
+            rom = a.finalize()
+        out = io.StringIO()
+        output.ihex(rom, out, base=0x200, skip_zero=True)
+        self.assertEqual(
+            out.getvalue().splitlines(),
+            [
+                ":1002000000E000000000000000000000000000000E",
+                ":0202400000EECE",
+                ":00000001FF",
+            ],
+        )
+        out = io.StringIO()
+        output.ihex(rom, out, base=0x200)
+        self.assertEqual(len(out.getvalue().splitlines()), 6)
+
+    def test_ihex_extended(self):
+        out = io.StringIO()
+        output.ihex([(0xFFFF, b"\x01\x02")], out, record_size=1)
+        self.assertEqual(
+            out.getvalue().splitlines(),
+            [":01FFFF000100", ":020000040001F9", ":0100000002FD", ":00000001FF"],
+        )
+
+    def test_srec(self):
+        out = io.StringIO()
+        output.srec([(0x1000, b"\x4c\x00\x10")], out)
+        self.assertEqual(
+            out.getvalue().splitlines(),
+            ["S0030000FC", "S10610004C00108D", "S5030001FB", "S9031000EC"],
+        )
+        out = io.StringIO()
+        output.srec([(0x123456, b"\xff")], out, start=0)
+        self.assertEqual(out.getvalue().splitlines()[1], "S205123456FF5F")
+        self.assertEqual(out.getvalue().splitlines()[-1], "S804000000FB")
+
+    def test_ines(self):
+        with mos6502.asm.new(pc_start=0x8000) as a:
+            with mos6502.label("reset"):
+                mos6502.JMP("reset")
+            with a.section("vectors", 0xFFFA):
+                a.dw(a.label("reset"), a.label("reset"), a.label("reset"))
+            prg = a.finalize()
+        out = io.BytesIO()
+        output.ines(prg, out, chr_rom=b"\xff" * 16, mapper=0x12, vertical=True)
+        nes = out.getvalue()
+        self.assertEqual(nes[:16], b"NES\x1a\x02\x01\x21\x10" + bytes(8))
+        self.assertEqual(len(nes), 16 + 0x8000 + 0x2000)
+        self.assertEqual(nes[16:19], b"\x4c\x00\x80")
+        self.assertEqual(nes[16 + 0x7FFA : 16 + 0x8000], b"\x00\x80" * 3)
+        with self.assertRaises(ValueError):
+            output.ines(b"", io.BytesIO())
+
+    def test_ch8(self):
+        out = io.BytesIO()
+        output.ch8([(0x200, b"\x00\xe0"), (0x204, b"\x00\xee")], out)
+        self.assertEqual(out.getvalue(), b"\x00\xe0\x00\x00\x00\xee")
+        with self.assertRaises(ValueError):
+            output.ch8([(0x100, b"\x00")], io.BytesIO())
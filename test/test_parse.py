@@ -0,0 +1,146 @@
+import io
+import os
+import tempfile
+import unittest
+from asmy import chip8, gmc4, lmc, mos6502, sweet16
+from asmy.parse import assemble, assemble_file, value
+
+
+class TestParse(unittest.TestCase):
+    def test_value(self):
+        self.assertEqual(value("$1F"), 0x1F)
+        self.assertEqual(value("0x10 + %101 - 1"), 20)
+        self.assertEqual(value("'A'"), 65)
+        self.assertEqual(value("loop"), "loop")
+        self.assertEqual(value("end - start"), mos6502.Expr("-", "end", "start"))
+        self.assertEqual(value("<table"), mos6502.lo("table"))
+        with self.assertRaises(ValueError):
+            value("1 2")
+
+    def test_mos6502(self):
+        source = """
+        ; count down from 6
+                .org $600
+        start:  LDA #6          ; A = 6
+                LDX #<data
+        loop:   STA $10,X
+                STA ($20),Y
+                STA ($20,X)
+                JMP (vector)
+                ASL A
+                ASL
+                DEX
+                BNE loop
+                RTS
+        vector: .dw start, $6261
+        data:   .byte "OK", 0
+        """
+        with mos6502.asm.new(pc_start=0x600) as a:
+            assemble(source, "mos6502")
+            rom = a.finalize()
+        with mos6502.asm.new(pc_start=0x600) as a:
+            with mos6502.label("start"):
+                mos6502.LDA(mos6502.I @ 6)
+                mos6502.LDX(mos6502.I @ mos6502.lo("data"))
+            with mos6502.label("loop"):
+                mos6502.STA(0x10, mos6502.X)
+                mos6502.STA([0x20], mos6502.Y)
+                mos6502.STA([0x20, mos6502.X])
+                mos6502.JMP(["vector"])
+                mos6502.ASL(mos6502.A)
+                mos6502.ASL(mos6502.A)
+                mos6502.DEX()
+                mos6502.BNE("loop")
+                mos6502.RTS()
+            with mos6502.label("vector"):
+                a.dw(a.label("start"), 0x6261)
+            with mos6502.label("data"):
+                a.db("OK", 0)
+            self.assertEqual(rom, a.finalize())
+        self.assertEqual(rom[:4].hex(), "a906a217")
+
+    def test_chip8(self):
+        source = """
+        start:
+            LD V0, 0
+            LD I, sprite
+            LD [I], V3
+            LD V3, [I]
+            LD DT, V1
+            ADD I, V2
+            ADD V0, 1
+            JP V0, start
+            DRW V0, V1, 5
+            SE V0, V1
+            JP start
+        sprite: .db $F0
+        """
+        with chip8.asm.new() as a:
+            assemble(source, chip8)
+            rom = a.finalize()
+        self.assertEqual(
+            rom.hex(" "),
+            "60 00 a2 16 f3 55 f3 65 f1 15 f2 1e 70 01 b2 00 d0 15 50 10 12 00 f0",
+        )
+
+    def test_generic(self):
+        with sweet16.asm.new() as a:
+            assemble("SET R1, $1234\nLD @R1\nloop: BNZ loop\nRTN", "sweet16")
+            self.assertEqual(a.finalize().hex(" "), "11 34 12 41 07 fe 00")
+        with lmc.asm.new() as a:
+            assemble("INP\nSTA n\nHLT\nn: DAT 5", lmc)
+            self.assertEqual(lmc.mem(), [901, 303, 0, 5])
+        with gmc4.asm.new() as a:
+            assemble("TIA 3\nM+\nJUMP 0", gmc4)
+            self.assertEqual(gmc4.mem(), "836f00")
+
+    def test_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "prog.s")
+            with open(path, "w") as f:
+                f.write("CLS\nloop: JP loop\n")
+            with chip8.asm.new() as a:
+                assemble_file(path, "chip8")
+                self.assertEqual(a.finalize().hex(), "00e01202")
+        with chip8.asm.new() as a:
+            assemble(io.StringIO("RET\n"), "chip8")
+            self.assertEqual(a.finalize().hex(), "00ee")
+
+    def test_negative(self):
+        self.assertEqual(value("-1"), -1)
+        self.assertEqual(value("-$10 + 1"), -15)
+        with mos6502.asm.new() as a:
+            assemble("LDA #-1\nLDX #-2\n.db -1\n.dw -2", "mos6502")
+            self.assertEqual(a.finalize().hex(" "), "a9 ff a2 fe ff fe ff")
+        with chip8.asm.new() as a:
+            assemble("ADD V0, -1", "chip8")
+            self.assertEqual(a.finalize().hex(), "70ff")
+
+    def test_listing(self):
+        with mos6502.asm.new(listing=True) as a:
+            assemble("start: LDA #1\nloop: INX\n  INX\n  BNE loop", "mos6502")
+            a.finalize()
+            rows = [(addr, raw.hex(), *row) for addr, raw, *row in a.listing]
+        self.assertEqual(
+            rows,
+            [
+                (0, "a901", "LDA", "<string>", 1),
+                (2, "e8", "INX", "<string>", 2),
+                (3, "e8", "INX", "<string>", 3),
+                (4, "d0fc", "BNE", "<string>", 4),
+            ],
+        )
+
+    def test_errors(self):
+        for source, message in [
+            ("NOP\nFOO", "line 2: Unknown instruction FOO"),
+            ("LDA #", "line 1: Missing value"),
+            ("LDX ($10),Y", "line 1: Invalid addressing mode"),
+            (".bss 4", "line 1: Unknown directive .bss"),
+            ("LDA ,", "line 1: Invalid value"),
+            ('NOP\n.dw "ab"', "line 2: unsupported operand"),
+        ]:
+            with mos6502.asm.new(), self.assertRaisesRegex(ValueError, message):
+                assemble(source, "mos6502")
+        with chip8.asm.new(), self.assertRaisesRegex(ValueError, "line 1: Invalid"):
+            assemble("LD V0, DT, 1", "chip8")
@@ -0,0 +1,128 @@
+import unittest
+from asmy.mos6502 import *
+from asmy.emu.mos6502 import CPU
+from asmy.peephole.mos6502 import optimize
+
+
+class TestPeepholeMOS6502(unittest.TestCase):
+    def test_rules(self):
+        with asm.new(pc_start=0x600) as a:
+            with optimize() as opt:
+                with label("start"):
+                    LDA(0x10)
+                    STA(0x10)
+                    CLC()
+                    CLC()
+                    CLC()
+                    JMP("next")
+                with label("next"):
+                    BNE("start")
+                    JSR("sub")
+                    RTS()
+                with label("sub"):
+                    LDX(I @ 1)
+                    RTS()
+            INX()
+            JMP("start")
+            rom = a.finalize()
+            self.assertEqual(a.labels, {"start": 0x600, "next": 0x603, "sub": 0x605})
+        # JSR sub; RTS becomes JMP sub, which then jumps to the next line
+        self.assertEqual(rom.hex(" "), "a5 10 18 d0 fb a2 01 60 e8 4c 00 06")
+        self.assertEqual(opt.bytes, 2 + 1 + 1 + 3 + 1 + 3)
+        self.assertEqual(opt.cycles, 3 + 2 + 2 + 3 + 9 + 3)
+        self.assertEqual(
+            opt.rules,
+            {"LDA x; STA x": 1, "CLC; CLC": 2, "JMP next": 2, "JSR f; RTS": 1},
+        )
+
+    def test_barriers(self):
+        def program():
+            LDA(0x2002)
+            STA(0x2002)  # volatile
+            LDA(0x10)
+            with label("entry"):
+                STA(0x10)  # reached from elsewhere
+            CLC()
+            asm.db(0x18)
+            CLC()
+            JSR("f")
+            with label("ret"):
+                RTS()
+            JMP("f")
+            LDA(I @ 1)
+            with label("f"):
+                RTS()
+
+        with asm.new() as a:
+            program()
+            expected = a.finalize()
+        with asm.new() as a:
+            with optimize(volatile={0x2002}) as opt:
+                program()
+            self.assertEqual(a.finalize(), expected)
+        self.assertEqual((opt.bytes, opt.cycles, opt.rules), (0, 0, {}))
+
+    def test_same_result(self):
+        def program():
+            LDX(I @ 5)
+            LDA(I @ 0)
+            with label("loop"):
+                CLC()
+                CLC()
+                ADC(I @ 3)
+                STA(0x20)
+                LDA(0x20)
+                STA(0x20)
+                JSR("dec")
+                BNE("loop")
+                JMP("done")
+            with label("dec"):
+                DEX()
+                RTS()
+            with label("done"):
+                BRK()
+
+        results = []
+        for optimized in (False, True):
+            with asm.new() as a:
+                if optimized:
+                    with optimize() as opt:
+                        program()
+                else:
+                    program()
+                rom = a.finalize()
+            cpu = CPU()
+            cpu.load(rom)
+            cpu.run(0)
+            results.append((cpu.a, cpu.x, cpu.mem[0x20], len(rom), cpu.cycles))
+        self.assertEqual(results[0][:3], results[1][:3])
+        self.assertEqual(results[0][3] - results[1][3], opt.bytes)
+        self.assertLess(results[1][4], results[0][4])
+
+    def test_listing(self):
+        with asm.new(listing=True) as a:
+            with optimize():
+                CLC()
+                CLC()
+                a.db(1)
+            a.finalize()
+            rows = [(addr, raw.hex(), name) for addr, raw, name, _, _ in a.listing]
+        self.assertEqual(rows, [(0, "18", "CLC"), (1, "01", "db")])
+
+    def test_errors(self):
+        with asm.new() as a:
+            with optimize(), self.assertRaises(ValueError):
+                with optimize():
+                    pass
+            self.assertIsNone(a.trace)
+            with self.assertRaisesRegex(ValueError, "section"), optimize():
+                LDA(I @ 1)
+                with a.section("data", 0x700):
+                    a.db(0xAA)
+            with self.assertRaisesRegex(ValueError, "fixup"), optimize():
+                a.fixup("x", 2, lambda rom, pos, addr: None)
+            self.assertIsNone(a.trace)
+
+
+if __name__ == "__main__":
+    unittest.main()